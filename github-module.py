@@ -1,39 +1,100 @@
 # tools/github_tool.py
-from flask import Blueprint, request, jsonify, current_app
-import requests
+from flask import Blueprint, Response, request, jsonify, current_app
+import orjson
+from ._http import build_session, raise_for_status, register_error_handlers
+from ._http_cache import cached_get, invalidate
 
 github_routes = Blueprint('github', __name__)
+register_error_handlers(github_routes)
+
+# Cache lifetimes (seconds) for idempotent GETs
+_TTL_METADATA = 600
+_TTL_SEARCH = 300
+_TTL_ISSUES = 60
+
+# GitHub's maximum page size for list endpoints
+_PER_PAGE = 100
+
+# Pooled HTTP session shared by all handlers (created lazily, since
+# current_app is not available at import time)
+_session = None
+
+def _get_session():
+    """Return the module-level GitHub session, creating it on first use"""
+    global _session
+    if _session is None:
+        _session = build_session(current_app.config, headers=current_app.config['GITHUB_HEADERS'])
+    return _session
+
+def warmup():
+    """Open a pooled connection to the GitHub API ahead of the first call"""
+    if not current_app.config.get('GITHUB_TOKEN'):
+        return
+    _get_session().head(current_app.config['GITHUB_URLS'].rate_limit)
+
+def _ttl(ttl):
+    """Cache lifetime for a GitHub GET; 0 makes every call a conditional request"""
+    return 0 if current_app.config['GITHUB_ALWAYS_REVALIDATE'] else ttl
 
 def handle_action(action, parameters):
     """Handle GitHub tool actions according to MCP standard"""
-    action_handlers = {
-        "listRepos": list_repos,
-        "getRepo": get_repo,
-        "searchRepos": search_repos,
-        "getIssues": get_issues,
-        "createIssue": create_issue
-    }
-    
-    if action not in action_handlers:
+    handler = _ACTION_HANDLERS.get(action)
+    if handler is None:
         raise ValueError(f"Unknown action: {action}")
     
-    return action_handlers[action](parameters)
+    return handler(parameters)
+
+def _project(items, fields):
+    """Keep only the requested fields of each item; fields may be a list or a comma-separated string"""
+    if not fields:
+        return items
+    if isinstance(fields, str):
+        fields = [field.strip() for field in fields.split(',') if field.strip()]
+    return [{field: item.get(field) for field in fields} for item in items]
+
+def _get_pages(url, params, ttl, limit=_PER_PAGE, raw=False):
+    """Fetch up to limit items from a paginated list endpoint; each page is cached on its own, and raw returns the first page's bytes"""
+    limit = int(limit)
+    if limit < 1:
+        raise ValueError("Limit must be a positive integer")
+    per_page = _PER_PAGE if raw else min(limit, _PER_PAGE)
+    
+    items = []
+    page = 1
+    while True:
+        batch = cached_get(
+            _get_session(),
+            url,
+            params={**params, 'per_page': per_page, 'page': page},
+            ttl=_ttl(ttl),
+            service='GitHub',
+            raw=raw
+        )
+        if raw:
+            return batch
+        items.extend(batch)
+        # A short page is the last one, so no need to request the next
+        if len(batch) < per_page or len(items) >= limit:
+            return items[:limit]
+        page += 1
 
-def list_repos(parameters):
+def list_repos(parameters, raw=False):
     """List repositories for a user or organization"""
     username = parameters.get('username')
     if not username:
         raise ValueError("Username parameter is required")
     
-    headers = {'Authorization': f'token {current_app.config["GITHUB_TOKEN"]}'}
-    response = requests.get(f'{current_app.config["GITHUB_API_URL"]}/users/{username}/repos', headers=headers)
-    
-    if response.status_code != 200:
-        raise Exception(f"GitHub API error: {response.json()}")
+    repos = _get_pages(
+        current_app.config['GITHUB_URLS'].user_repos.format(username=username),
+        {},
+        _TTL_METADATA,
+        limit=parameters.get('limit', _PER_PAGE),
+        raw=raw
+    )
     
-    return response.json()
+    return repos if raw else _project(repos, parameters.get('fields'))
 
-def get_repo(parameters):
+def get_repo(parameters, raw=False):
     """Get details for a specific repository"""
     owner = parameters.get('owner')
     repo = parameters.get('repo')
@@ -41,34 +102,36 @@ def get_repo(parameters):
     if not owner or not repo:
         raise ValueError("Owner and repo parameters are required")
     
-    headers = {'Authorization': f'token {current_app.config["GITHUB_TOKEN"]}'}
-    response = requests.get(f'{current_app.config["GITHUB_API_URL"]}/repos/{owner}/{repo}', headers=headers)
-    
-    if response.status_code != 200:
-        raise Exception(f"GitHub API error: {response.json()}")
-    
-    return response.json()
+    return cached_get(
+        _get_session(),
+        current_app.config['GITHUB_URLS'].repo.format(owner=owner, repo=repo),
+        ttl=_ttl(_TTL_METADATA),
+        service='GitHub',
+        raw=raw
+    )
 
-def search_repos(parameters):
+def search_repos(parameters, raw=False):
     """Search for repositories"""
     query = parameters.get('query')
     
     if not query:
         raise ValueError("Query parameter is required")
     
-    headers = {'Authorization': f'token {current_app.config["GITHUB_TOKEN"]}'}
-    response = requests.get(
-        f'{current_app.config["GITHUB_API_URL"]}/search/repositories',
-        params={'q': query},
-        headers=headers
+    results = cached_get(
+        _get_session(),
+        current_app.config['GITHUB_URLS'].search_repos,
+        params={'q': query, 'per_page': _PER_PAGE},
+        ttl=_ttl(_TTL_SEARCH),
+        service='GitHub',
+        raw=raw
     )
     
-    if response.status_code != 200:
-        raise Exception(f"GitHub API error: {response.json()}")
-    
-    return response.json()
+    fields = parameters.get('fields')
+    if raw or not fields:
+        return results
+    return {**results, 'items': _project(results.get('items', []), fields)}
 
-def get_issues(parameters):
+def get_issues(parameters, raw=False):
     """Get issues for a repository"""
     owner = parameters.get('owner')
     repo = parameters.get('repo')
@@ -77,17 +140,15 @@ def get_issues(parameters):
     if not owner or not repo:
         raise ValueError("Owner and repo parameters are required")
     
-    headers = {'Authorization': f'token {current_app.config["GITHUB_TOKEN"]}'}
-    response = requests.get(
-        f'{current_app.config["GITHUB_API_URL"]}/repos/{owner}/{repo}/issues',
-        params={'state': state},
-        headers=headers
+    issues = _get_pages(
+        current_app.config['GITHUB_URLS'].issues.format(owner=owner, repo=repo),
+        {'state': state},
+        _TTL_ISSUES,
+        limit=parameters.get('limit', _PER_PAGE),
+        raw=raw
     )
     
-    if response.status_code != 200:
-        raise Exception(f"GitHub API error: {response.json()}")
-    
-    return response.json()
+    return issues if raw else _project(issues, parameters.get('fields'))
 
 def create_issue(parameters):
     """Create a new issue in a repository"""
@@ -101,70 +162,65 @@ def create_issue(parameters):
     if not title:
         raise ValueError("Title parameter is required")
     
-    headers = {'Authorization': f'token {current_app.config["GITHUB_TOKEN"]}'}
-    response = requests.post(
-        f'{current_app.config["GITHUB_API_URL"]}/repos/{owner}/{repo}/issues',
-        json={'title': title, 'body': body},
-        headers=headers
+    url = current_app.config['GITHUB_URLS'].issues.format(owner=owner, repo=repo)
+    response = _get_session().post(
+        url,
+        json={'title': title, 'body': body}
     )
     
-    if response.status_code not in (201, 200):
-        raise Exception(f"GitHub API error: {response.json()}")
+    raise_for_status(response, 'GitHub', ok=(200, 201))
+    
+    # The cached issue listings for this repository are now out of date
+    invalidate(url)
     
-    return response.json()
+    return orjson.loads(response.content)
+
+# Dispatch table for handle_action, built once at import
+_ACTION_HANDLERS = {
+    "listRepos": list_repos,
+    "getRepo": get_repo,
+    "searchRepos": search_repos,
+    "getIssues": get_issues,
+    "createIssue": create_issue
+}
 
 # API routes for direct access (not through MCP gateway)
 @github_routes.route('/listRepos', methods=['GET'])
 def api_list_repos():
     """API endpoint for listing repositories"""
-    try:
-        username = request.args.get('username')
-        result = list_repos({'username': username})
-        return jsonify(result)
-    except Exception as e:
-        return jsonify({'error': str(e)}), 400
+    username = request.args.get('username')
+    result = list_repos({'username': username}, raw=True)
+    return Response(result, mimetype='application/json')
 
 @github_routes.route('/getRepo/<owner>/<repo>', methods=['GET'])
 def api_get_repo(owner, repo):
     """API endpoint for getting a specific repository"""
-    try:
-        result = get_repo({'owner': owner, 'repo': repo})
-        return jsonify(result)
-    except Exception as e:
-        return jsonify({'error': str(e)}), 400
+    result = get_repo({'owner': owner, 'repo': repo}, raw=True)
+    return Response(result, mimetype='application/json')
 
 @github_routes.route('/searchRepos', methods=['GET'])
 def api_search_repos():
     """API endpoint for searching repositories"""
-    try:
-        query = request.args.get('query')
-        result = search_repos({'query': query})
-        return jsonify(result)
-    except Exception as e:
-        return jsonify({'error': str(e)}), 400
+    query = request.args.get('query')
+    result = search_repos({'query': query}, raw=True)
+    return Response(result, mimetype='application/json')
 
 @github_routes.route('/getIssues/<owner>/<repo>', methods=['GET'])
 def api_get_issues(owner, repo):
     """API endpoint for getting issues for a repository"""
-    try:
-        state = request.args.get('state', 'open')
-        result = get_issues({'owner': owner, 'repo': repo, 'state': state})
-        return jsonify(result)
-    except Exception as e:
-        return jsonify({'error': str(e)}), 400
+    state = request.args.get('state', 'open')
+    result = get_issues({'owner': owner, 'repo': repo, 'state': state}, raw=True)
+    return Response(result, mimetype='application/json')
 
 @github_routes.route('/createIssue/<owner>/<repo>', methods=['POST'])
 def api_create_issue(owner, repo):
     """API endpoint for creating a new issue"""
-    try:
-        data = request.get_json()
-        parameters = {
-            'owner': owner,
-            'repo': repo,
-            'title': data.get('title'),
-            'body': data.get('body', '')
-        }
-        result = create_issue(parameters)
-        return jsonify(result), 201
-    except Exception as e:
-        return jsonify({'error': str(e)}), 400
+    data = request.get_json()
+    parameters = {
+        'owner': owner,
+        'repo': repo,
+        'title': data.get('title'),
+        'body': data.get('body', '')
+    }
+    result = create_issue(parameters)
+    return jsonify(result), 201
@@ -1,70 +1,85 @@
 # tools/gitlab_tool.py
-from flask import Blueprint, request, jsonify, current_app
-import requests
+from flask import Blueprint, Response, request, jsonify, current_app
+import orjson
+from ._http import build_session, raise_for_status, register_error_handlers
+from ._http_cache import cached_get, invalidate
 
 gitlab_routes = Blueprint('gitlab', __name__)
+register_error_handlers(gitlab_routes)
+
+# Cache lifetimes (seconds) for idempotent GETs
+_TTL_METADATA = 600
+_TTL_SEARCH = 300
+_TTL_ISSUES = 60
+_TTL_PIPELINES = 60
+
+# Pooled HTTP session shared by all handlers (created lazily, since
+# current_app is not available at import time)
+_session = None
+
+def _get_session():
+    """Return the module-level GitLab session, creating it on first use"""
+    global _session
+    if _session is None:
+        _session = build_session(current_app.config, headers=current_app.config['GITLAB_HEADERS'])
+    return _session
+
+def warmup():
+    """Open a pooled connection to the GitLab API ahead of the first call"""
+    if not current_app.config.get('GITLAB_TOKEN'):
+        return
+    _get_session().head(current_app.config['GITLAB_URLS'].version)
 
 def handle_action(action, parameters):
     """Handle GitLab tool actions according to MCP standard"""
-    action_handlers = {
-        "listProjects": list_projects,
-        "getProject": get_project,
-        "searchProjects": search_projects,
-        "getIssues": get_issues,
-        "createIssue": create_issue,
-        "getPipelines": get_pipelines
-    }
-    
-    if action not in action_handlers:
+    handler = _ACTION_HANDLERS.get(action)
+    if handler is None:
         raise ValueError(f"Unknown action: {action}")
     
-    return action_handlers[action](parameters)
+    return handler(parameters)
 
-def list_projects(parameters):
+def list_projects(parameters, raw=False):
     """List all projects accessible by the authenticated user"""
-    headers = {'Private-Token': current_app.config['GITLAB_TOKEN']}
-    response = requests.get(f'{current_app.config["GITLAB_API_URL"]}/projects', headers=headers)
-    
-    if response.status_code != 200:
-        raise Exception(f"GitLab API error: {response.json()}")
-    
-    return response.json()
+    return cached_get(
+        _get_session(),
+        current_app.config['GITLAB_URLS'].projects,
+        ttl=_TTL_METADATA,
+        service='GitLab',
+        raw=raw
+    )
 
-def get_project(parameters):
+def get_project(parameters, raw=False):
     """Get details for a specific project"""
     project_id = parameters.get('projectId')
     
     if not project_id:
         raise ValueError("Project ID parameter is required")
     
-    headers = {'Private-Token': current_app.config['GITLAB_TOKEN']}
-    response = requests.get(f'{current_app.config["GITLAB_API_URL"]}/projects/{project_id}', headers=headers)
-    
-    if response.status_code != 200:
-        raise Exception(f"GitLab API error: {response.json()}")
-    
-    return response.json()
+    return cached_get(
+        _get_session(),
+        current_app.config['GITLAB_URLS'].project.format(project_id=project_id),
+        ttl=_TTL_METADATA,
+        service='GitLab',
+        raw=raw
+    )
 
-def search_projects(parameters):
+def search_projects(parameters, raw=False):
     """Search for projects on GitLab"""
     query = parameters.get('query')
     
     if not query:
         raise ValueError("Query parameter is required")
     
-    headers = {'Private-Token': current_app.config['GITLAB_TOKEN']}
-    response = requests.get(
-        f'{current_app.config["GITLAB_API_URL"]}/search',
+    return cached_get(
+        _get_session(),
+        current_app.config['GITLAB_URLS'].search,
         params={'scope': 'projects', 'search': query},
-        headers=headers
+        ttl=_TTL_SEARCH,
+        service='GitLab',
+        raw=raw
     )
-    
-    if response.status_code != 200:
-        raise Exception(f"GitLab API error: {response.json()}")
-    
-    return response.json()
 
-def get_issues(parameters):
+def get_issues(parameters, raw=False):
     """Get issues for a project"""
     project_id = parameters.get('projectId')
     state = parameters.get('state', 'opened')
@@ -72,17 +87,14 @@ def get_issues(parameters):
     if not project_id:
         raise ValueError("Project ID parameter is required")
     
-    headers = {'Private-Token': current_app.config['GITLAB_TOKEN']}
-    response = requests.get(
-        f'{current_app.config["GITLAB_API_URL"]}/projects/{project_id}/issues',
+    return cached_get(
+        _get_session(),
+        current_app.config['GITLAB_URLS'].issues.format(project_id=project_id),
         params={'state': state},
-        headers=headers
+        ttl=_TTL_ISSUES,
+        service='GitLab',
+        raw=raw
     )
-    
-    if response.status_code != 200:
-        raise Exception(f"GitLab API error: {response.json()}")
-    
-    return response.json()
 
 def create_issue(parameters):
     """Create a new issue in a project"""
@@ -95,95 +107,85 @@ def create_issue(parameters):
     if not title:
         raise ValueError("Title parameter is required")
     
-    headers = {'Private-Token': current_app.config['GITLAB_TOKEN']}
-    response = requests.post(
-        f'{current_app.config["GITLAB_API_URL"]}/projects/{project_id}/issues',
-        json={'title': title, 'description': description},
-        headers=headers
+    url = current_app.config['GITLAB_URLS'].issues.format(project_id=project_id)
+    response = _get_session().post(
+        url,
+        json={'title': title, 'description': description}
     )
     
-    if response.status_code not in (201, 200):
-        raise Exception(f"GitLab API error: {response.json()}")
+    raise_for_status(response, 'GitLab', ok=(200, 201))
     
-    return response.json()
+    # The cached issue listings for this project are now out of date
+    invalidate(url)
+    
+    return orjson.loads(response.content)
 
-def get_pipelines(parameters):
+def get_pipelines(parameters, raw=False):
     """Get pipelines for a project"""
     project_id = parameters.get('projectId')
     
     if not project_id:
         raise ValueError("Project ID parameter is required")
     
-    headers = {'Private-Token': current_app.config['GITLAB_TOKEN']}
-    response = requests.get(
-        f'{current_app.config["GITLAB_API_URL"]}/projects/{project_id}/pipelines',
-        headers=headers
+    return cached_get(
+        _get_session(),
+        current_app.config['GITLAB_URLS'].pipelines.format(project_id=project_id),
+        ttl=_TTL_PIPELINES,
+        service='GitLab',
+        raw=raw
     )
-    
-    if response.status_code != 200:
-        raise Exception(f"GitLab API error: {response.json()}")
-    
-    return response.json()
+
+# Dispatch table for handle_action, built once at import
+_ACTION_HANDLERS = {
+    "listProjects": list_projects,
+    "getProject": get_project,
+    "searchProjects": search_projects,
+    "getIssues": get_issues,
+    "createIssue": create_issue,
+    "getPipelines": get_pipelines
+}
 
 # API routes for direct access (not through MCP gateway)
 @gitlab_routes.route('/listProjects', methods=['GET'])
 def api_list_projects():
     """API endpoint for listing projects"""
-    try:
-        result = list_projects({})
-        return jsonify(result)
-    except Exception as e:
-        return jsonify({'error': str(e)}), 400
+    result = list_projects({}, raw=True)
+    return Response(result, mimetype='application/json')
 
 @gitlab_routes.route('/getProject/<project_id>', methods=['GET'])
 def api_get_project(project_id):
     """API endpoint for getting a specific project"""
-    try:
-        result = get_project({'projectId': project_id})
-        return jsonify(result)
-    except Exception as e:
-        return jsonify({'error': str(e)}), 400
+    result = get_project({'projectId': project_id}, raw=True)
+    return Response(result, mimetype='application/json')
 
 @gitlab_routes.route('/searchProjects', methods=['GET'])
 def api_search_projects():
     """API endpoint for searching projects"""
-    try:
-        query = request.args.get('query')
-        result = search_projects({'query': query})
-        return jsonify(result)
-    except Exception as e:
-        return jsonify({'error': str(e)}), 400
+    query = request.args.get('query')
+    result = search_projects({'query': query}, raw=True)
+    return Response(result, mimetype='application/json')
 
 @gitlab_routes.route('/getIssues/<project_id>', methods=['GET'])
 def api_get_issues(project_id):
     """API endpoint for getting issues for a project"""
-    try:
-        state = request.args.get('state', 'opened')
-        result = get_issues({'projectId': project_id, 'state': state})
-        return jsonify(result)
-    except Exception as e:
-        return jsonify({'error': str(e)}), 400
+    state = request.args.get('state', 'opened')
+    result = get_issues({'projectId': project_id, 'state': state}, raw=True)
+    return Response(result, mimetype='application/json')
 
 @gitlab_routes.route('/createIssue/<project_id>', methods=['POST'])
 def api_create_issue(project_id):
     """API endpoint for creating a new issue"""
-    try:
-        data = request.get_json()
-        parameters = {
-            'projectId': project_id,
-            'title': data.get('title'),
-            'description': data.get('description', '')
-        }
-        result = create_issue(parameters)
-        return jsonify(result), 201
-    except Exception as e:
-        return jsonify({'error': str(e)}), 400
+    data = request.get_json()
+    parameters = {
+        'projectId': project_id,
+        'title': data.get('title'),
+        'description': data.get('description', '')
+    }
+    result = create_issue(parameters)
+    return jsonify(result), 201
 
 @gitlab_routes.route('/getPipelines/<project_id>', methods=['GET'])
 def api_get_pipelines(project_id):
     """API endpoint for getting pipelines for a project"""
-    try:
-        result = get_pipelines({'projectId': project_id})
-        return jsonify(result)
-    except Exception as e:
-        return jsonify({'error': str(e)}), 400
+    result = get_pipelines({'projectId': project_id}, raw=True)
+    return Response(result, mimetype='application/json')
@@ -1,44 +1,88 @@
 # tools/gmaps_tool.py
-from flask import Blueprint, request, jsonify, current_app
-import requests
+import random
+import time
+from flask import Blueprint, Response, request, current_app
+from ._http import build_session, register_error_handlers
+from ._http_cache import cached_get
 
 gmaps_routes = Blueprint('gmaps', __name__)
+register_error_handlers(gmaps_routes)
+
+# Cache lifetimes (seconds) for idempotent GETs; addresses are stable
+_TTL_GEOCODE = 86400
+_TTL_DIRECTIONS = 300
+_TTL_PLACES = 3600
+
+_GEOCODE_URL = 'https://maps.googleapis.com/maps/api/geocode/json'
+
+# Retries for OVER_QUERY_LIMIT, which Google returns inside a 200 response
+_QUOTA_RETRIES = 3
+_QUOTA_BACKOFF = 0.5  # seconds, doubled on each retry
+
+# Pooled HTTP session shared by all handlers (created lazily, since
+# current_app is not available at import time)
+_session = None
+
+def _get_session():
+    """Return the module-level Google Maps session, creating it on first use"""
+    global _session
+    if _session is None:
+        _session = build_session(current_app.config, params={'key': current_app.config['GMAPS_API_KEY']})
+    return _session
+
+class _OverQueryLimit(Exception):
+    """Google Maps rejected the request for exceeding the QPS quota"""
+
+def _check_status(body):
+    """Only cache successful responses; signal OVER_QUERY_LIMIT so the call is retried"""
+    status = body.get('status')
+    if status == 'OVER_QUERY_LIMIT':
+        raise _OverQueryLimit(body.get('error_message', status))
+    return status in ('OK', 'ZERO_RESULTS')
+
+def _maps_get(url, params, ttl, raw):
+    """GET a Google Maps endpoint through the response cache, backing off on OVER_QUERY_LIMIT"""
+    for attempt in range(_QUOTA_RETRIES + 1):
+        try:
+            return cached_get(
+                _get_session(),
+                url,
+                params=params,
+                ttl=ttl,
+                service='Google Maps',
+                raw=raw,
+                validate=_check_status
+            )
+        except _OverQueryLimit as e:
+            if attempt == _QUOTA_RETRIES:
+                raise Exception(f"Google Maps API error: OVER_QUERY_LIMIT ({e})")
+            time.sleep(_QUOTA_BACKOFF * (2 ** attempt) * random.uniform(0.5, 1.5))
+
+def warmup():
+    """Open a pooled connection to the Google Maps API ahead of the first call"""
+    if not current_app.config.get('GMAPS_API_KEY'):
+        return
+    # A bare HEAD establishes the connection without spending billable quota
+    _get_session().head('https://maps.googleapis.com/')
 
 def handle_action(action, parameters):
     """Handle Google Maps tool actions according to MCP standard"""
-    action_handlers = {
-        "geocode": geocode,
-        "reverseGeocode": reverse_geocode,
-        "getDirections": get_directions,
-        "searchPlaces": search_places,
-        "getPlaceDetails": get_place_details
-    }
-    
-    if action not in action_handlers:
+    handler = _ACTION_HANDLERS.get(action)
+    if handler is None:
         raise ValueError(f"Unknown action: {action}")
     
-    return action_handlers[action](parameters)
+    return handler(parameters)
 
-def geocode(parameters):
+def geocode(parameters, raw=False):
     """Convert an address to geographic coordinates"""
     address = parameters.get('address')
     
     if not address:
         raise ValueError("Address parameter is required")
     
-    params = {
-        'address': address,
-        'key': current_app.config['GMAPS_API_KEY']
-    }
-    
-    response = requests.get('https://maps.googleapis.com/maps/api/geocode/json', params=params)
-    
-    if response.status_code != 200:
-        raise Exception(f"Google Maps API error: {response.json()}")
-    
-    return response.json()
+    return _maps_get(_GEOCODE_URL, {'address': address}, _TTL_GEOCODE, raw)
 
-def reverse_geocode(parameters):
+def reverse_geocode(parameters, raw=False):
     """Convert geographic coordinates to an address"""
     lat = parameters.get('lat')
     lng = parameters.get('lng')
@@ -46,19 +90,9 @@ def reverse_geocode(parameters):
     if not lat or not lng:
         raise ValueError("Latitude and longitude parameters are required")
     
-    params = {
-        'latlng': f'{lat},{lng}',
-        'key': current_app.config['GMAPS_API_KEY']
-    }
-    
-    response = requests.get('https://maps.googleapis.com/maps/api/geocode/json', params=params)
-    
-    if response.status_code != 200:
-        raise Exception(f"Google Maps API error: {response.json()}")
-    
-    return response.json()
+    return _maps_get(_GEOCODE_URL, {'latlng': f'{lat},{lng}'}, _TTL_GEOCODE, raw)
 
-def get_directions(parameters):
+def get_directions(parameters, raw=False):
     """Get directions between two locations"""
     origin = parameters.get('origin')
     destination = parameters.get('destination')
@@ -70,18 +104,12 @@ def get_directions(parameters):
     params = {
         'origin': origin,
         'destination': destination,
-        'mode': mode,
-        'key': current_app.config['GMAPS_API_KEY']
+        'mode': mode
     }
     
-    response = requests.get('https://maps.googleapis.com/maps/api/directions/json', params=params)
-    
-    if response.status_code != 200:
-        raise Exception(f"Google Maps API error: {response.json()}")
-    
-    return response.json()
+    return _maps_get('https://maps.googleapis.com/maps/api/directions/json', params, _TTL_DIRECTIONS, raw)
 
-def search_places(parameters):
+def search_places(parameters, raw=False):
     """Search for places using the Google Places API"""
     query = parameters.get('query')
     location = parameters.get('location')
@@ -91,9 +119,7 @@ def search_places(parameters):
     if not query and not (location and place_type):
         raise ValueError("Either query or location with type parameters are required")
     
-    params = {
-        'key': current_app.config['GMAPS_API_KEY']
-    }
+    params = {}
     
     if query:
         params['query'] = query
@@ -104,14 +130,9 @@ def search_places(parameters):
         params['type'] = place_type
         url = 'https://maps.googleapis.com/maps/api/place/nearbysearch/json'
     
-    response = requests.get(url, params=params)
-    
-    if response.status_code != 200:
-        raise Exception(f"Google Maps API error: {response.json()}")
-    
-    return response.json()
+    return _maps_get(url, params, _TTL_PLACES, raw)
 
-def get_place_details(parameters):
+def get_place_details(parameters, raw=False):
     """Get details for a specific place"""
     place_id = parameters.get('placeId')
     
@@ -120,72 +141,60 @@ def get_place_details(parameters):
     
     params = {
         'place_id': place_id,
-        'fields': 'name,rating,formatted_address,geometry,photo,opening_hours,price_level,website,formatted_phone_number',
-        'key': current_app.config['GMAPS_API_KEY']
+        'fields': 'name,rating,formatted_address,geometry,photo,opening_hours,price_level,website,formatted_phone_number'
     }
     
-    response = requests.get('https://maps.googleapis.com/maps/api/place/details/json', params=params)
-    
-    if response.status_code != 200:
-        raise Exception(f"Google Maps API error: {response.json()}")
-    
-    return response.json()
+    return _maps_get('https://maps.googleapis.com/maps/api/place/details/json', params, _TTL_PLACES, raw)
+
+# Dispatch table for handle_action, built once at import
+_ACTION_HANDLERS = {
+    "geocode": geocode,
+    "reverseGeocode": reverse_geocode,
+    "getDirections": get_directions,
+    "searchPlaces": search_places,
+    "getPlaceDetails": get_place_details
+}
 
 # API routes for direct access (not through MCP gateway)
 @gmaps_routes.route('/geocode', methods=['GET'])
 def api_geocode():
     """API endpoint for geocoding an address"""
-    try:
-        address = request.args.get('address')
-        result = geocode({'address': address})
-        return jsonify(result)
-    except Exception as e:
-        return jsonify({'error': str(e)}), 400
+    address = request.args.get('address')
+    result = geocode({'address': address}, raw=True)
+    return Response(result, mimetype='application/json')
 
 @gmaps_routes.route('/reverseGeocode', methods=['GET'])
 def api_reverse_geocode():
     """API endpoint for reverse geocoding coordinates"""
-    try:
-        lat = request.args.get('lat')
-        lng = request.args.get('lng')
-        result = reverse_geocode({'lat': lat, 'lng': lng})
-        return jsonify(result)
-    except Exception as e:
-        return jsonify({'error': str(e)}), 400
+    lat = request.args.get('lat')
+    lng = request.args.get('lng')
+    result = reverse_geocode({'lat': lat, 'lng': lng}, raw=True)
+    return Response(result, mimetype='application/json')
 
 @gmaps_routes.route('/getDirections', methods=['GET'])
 def api_get_directions():
     """API endpoint for getting directions"""
-    try:
-        origin = request.args.get('origin')
-        destination = request.args.get('destination')
-        mode = request.args.get('mode', 'driving')
-        result = get_directions({'origin': origin, 'destination': destination, 'mode': mode})
-        return jsonify(result)
-    except Exception as e:
-        return jsonify({'error': str(e)}), 400
+    origin = request.args.get('origin')
+    destination = request.args.get('destination')
+    mode = request.args.get('mode', 'driving')
+    result = get_directions({'origin': origin, 'destination': destination, 'mode': mode}, raw=True)
+    return Response(result, mimetype='application/json')
 
 @gmaps_routes.route('/searchPlaces', methods=['GET'])
 def api_search_places():
     """API endpoint for searching places"""
-    try:
-        parameters = {
-            'query': request.args.get('query'),
-            'location': request.args.get('location'),
-            'radius': request.args.get('radius', 1000),
-            'type': request.args.get('type')
-        }
-        result = search_places(parameters)
-        return jsonify(result)
-    except Exception as e:
-        return jsonify({'error': str(e)}), 400
+    parameters = {
+        'query': request.args.get('query'),
+        'location': request.args.get('location'),
+        'radius': request.args.get('radius', 1000),
+        'type': request.args.get('type')
+    }
+    result = search_places(parameters, raw=True)
+    return Response(result, mimetype='application/json')
 
 @gmaps_routes.route('/getPlaceDetails', methods=['GET'])
 def api_get_place_details():
     """API endpoint for getting place details"""
-    try:
-        place_id = request.args.get('placeId')
-        result = get_place_details({'placeId': place_id})
-        return jsonify(result)
-    except Exception as e:
-        return jsonify({'error': str(e)}), 400
+    place_id = request.args.get('placeId')
+    result = get_place_details({'placeId': place_id}, raw=True)
+    return Response(result, mimetype='application/json')
@@ -0,0 +1,27 @@
+# gunicorn.conf.py
+"""
+Gunicorn settings for running the MCP server in production.
+
+Usage: gunicorn -c gunicorn.conf.py app:app
+"""
+
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+
+# Processes run Python in parallel; threads in each worker cover the time
+# spent blocked on upstream APIs, the database and Puppeteer renders
+worker_class = 'gthread'
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count()))
+threads = int(os.environ.get('GUNICORN_THREADS', '8'))
+
+# Puppeteer renders and rate-limit waits can legitimately take a while
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '120'))
+keepalive = 5
+
+# Load the app in each worker, so HTTP pools, caches, the DB engine and the
+# warmup thread are created after fork rather than shared with the master
+preload_app = False
+
+accesslog = '-'
@@ -0,0 +1,314 @@
+# tools/_http_cache.py
+"""
+Response cache for idempotent upstream GETs.
+
+Lookups go through two tiers before touching the network:
+- L1: an in-process LRU+TTL cache (per worker)
+- L2: an optional Redis/Valkey cache shared by all workers
+  (enabled by setting HTTP_CACHE_REDIS_URL)
+
+Expired entries are kept (until evicted) so the next request can
+revalidate them with If-None-Match / If-Modified-Since; a 304 Not Modified
+reuses the cached body and, on GitHub, does not count against the rate
+limit.
+
+Concurrent misses for the same key are coalesced: one thread performs the
+upstream request and the others wait for its result.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import orjson
+from flask import current_app
+
+from ._http import raise_for_status
+
+
+class TTLCache:
+    """Thread-safe LRU cache with a per-entry time-to-live."""
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self._store = OrderedDict()
+        self._lock = threading.RLock()
+
+    def get(self, key):
+        """Return the cached value, or None if missing or expired."""
+        with self._lock:
+            entry = self._store.get(key)
+            if entry is None or entry[1] <= time.monotonic():
+                return None
+            self._store.move_to_end(key)
+            return entry[0]
+
+    def get_stale(self, key):
+        """Return the cached value even if it has expired, or None if missing."""
+        with self._lock:
+            entry = self._store.get(key)
+            return entry[0] if entry is not None else None
+
+    def set(self, key, value, ttl):
+        """Store a value for ttl seconds, evicting the least recently used entries."""
+        with self._lock:
+            self._store[key] = (value, time.monotonic() + ttl)
+            self._store.move_to_end(key)
+            while len(self._store) > self.maxsize:
+                self._store.popitem(last=False)
+
+    def pop(self, key, default=None):
+        """Remove a key and return its value."""
+        with self._lock:
+            entry = self._store.pop(key, None)
+            return entry[0] if entry is not None else default
+
+    def discard_where(self, predicate):
+        """Remove every entry whose key matches predicate."""
+        with self._lock:
+            for key in [k for k in self._store if predicate(k)]:
+                del self._store[key]
+
+
+class CachedResponse:
+    """A cached upstream body: the raw JSON bytes plus its validators, decoded lazily."""
+
+    __slots__ = ('content', 'etag', 'last_modified', '_body')
+
+    def __init__(self, content, etag=None, last_modified=None):
+        self.content = content
+        self.etag = etag
+        self.last_modified = last_modified
+        self._body = None
+
+    def json(self):
+        """Return the decoded body, parsing the raw bytes at most once."""
+        if self._body is None:
+            self._body = orjson.loads(self.content)
+        return self._body
+
+
+_responses = TTLCache(maxsize=10000)
+
+# Expired L2 entries are kept this long (seconds) for ETag revalidation
+_SHARED_STALE_GRACE = 3600
+
+# Shared (L2) cache client, created lazily from the app config
+_shared = None
+_shared_initialized = False
+
+# Upstream fetches in progress, keyed by cache key (single-flight)
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+# Hit/miss counters, logged every _STATS_LOG_INTERVAL lookups
+_STATS_LOG_INTERVAL = 1000
+_stats = {'l1_hits': 0, 'l2_hits': 0, 'revalidated': 0, 'misses': 0}
+_stats_lock = threading.Lock()
+
+
+def cache_key(url, params=None):
+    """
+    Build the cache key for a GET: the URL plus its sorted query params.
+
+    params must be a dict: requests merges the session's default params
+    (such as an API key) into a request only when its params are a mapping.
+    """
+    return (url, tuple(sorted(params.items())) if params else ())
+
+
+def _get_shared_cache():
+    """Return the shared Redis client, or None if L2 caching is disabled."""
+    global _shared, _shared_initialized
+    if not _shared_initialized:
+        redis_url = current_app.config.get('HTTP_CACHE_REDIS_URL')
+        if redis_url:
+            try:
+                import redis  # redis-py is compatible with Valkey
+                pool = redis.BlockingConnectionPool.from_url(redis_url, max_connections=32, timeout=1)
+                _shared = redis.Redis(connection_pool=pool)
+            except ImportError:
+                current_app.logger.warning("redis package not installed, shared HTTP cache disabled")
+        _shared_initialized = True
+    return _shared
+
+
+def _shared_key(key):
+    return 'mcp:http:' + hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+
+
+def _shared_url_index(url):
+    """Redis set holding every shared key cached for url (used by invalidate)."""
+    return 'mcp:http:url:' + hashlib.sha1(url.encode('utf-8')).hexdigest()
+
+
+def _shared_get(key):
+    """
+    Look up a response in the shared cache.
+
+    Returns:
+        (entry, remaining_ttl) where entry is a CachedResponse, or (None, 0) on a miss.
+        remaining_ttl is <= 0 for an expired entry that can still be revalidated.
+    """
+    shared = _get_shared_cache()
+    if shared is None:
+        return None, 0
+    try:
+        data = shared.hmget(_shared_key(key), 'body', 'etag', 'expires', 'modified')
+    except Exception as e:
+        current_app.logger.warning(f"Shared HTTP cache read failed: {e}")
+        return None, 0
+    if data[0] is None:
+        return None, 0
+    etag = data[1].decode('utf-8') if data[1] else None
+    last_modified = data[3].decode('utf-8') if data[3] else None
+    return CachedResponse(data[0], etag, last_modified), float(data[2]) - time.time()
+
+
+def _shared_set(key, entry, ttl):
+    """Store a response in the shared cache."""
+    shared = _get_shared_cache()
+    if shared is None:
+        return
+    redis_key = _shared_key(key)
+    try:
+        pipe = shared.pipeline()
+        pipe.hset(redis_key, mapping={
+            'body': entry.content,
+            'etag': entry.etag or '',
+            'modified': entry.last_modified or '',
+            'expires': time.time() + ttl
+        })
+        pipe.expire(redis_key, int(ttl) + _SHARED_STALE_GRACE)
+        index_key = _shared_url_index(key[0])
+        pipe.sadd(index_key, redis_key)
+        pipe.expire(index_key, int(ttl) + _SHARED_STALE_GRACE)
+        pipe.execute()
+    except Exception as e:
+        current_app.logger.warning(f"Shared HTTP cache write failed: {e}")
+
+
+def _record(outcome):
+    """Count a cache lookup outcome and periodically log the hit ratio."""
+    with _stats_lock:
+        _stats[outcome] += 1
+        total = sum(_stats.values())
+        if total % _STATS_LOG_INTERVAL:
+            return
+        snapshot = dict(_stats)
+    hits = snapshot['l1_hits'] + snapshot['l2_hits'] + snapshot['revalidated']
+    current_app.logger.info(
+        f"HTTP cache: {hits}/{total} served from cache "
+        f"(l1={snapshot['l1_hits']} l2={snapshot['l2_hits']} "
+        f"304={snapshot['revalidated']} miss={snapshot['misses']})"
+    )
+
+
+def cached_get(session, url, params=None, ttl=300, service='Upstream', raw=False, validate=None):
+    """
+    GET a JSON resource through the shared response cache.
+
+    Args:
+        session: The requests.Session to use on a cache miss
+        url: The resource URL
+        params: Optional query parameters (a dict)
+        ttl: How long (seconds) a response is served without revalidation
+        service: Service name used in error messages
+        raw: Return the upstream JSON bytes verbatim instead of decoding them
+        validate: Optional check run on the decoded body of a fresh 200 response;
+            return False to pass the response through without caching it,
+            or raise to reject it
+
+    Returns:
+        The decoded JSON body, or its raw bytes if raw is set
+    """
+    key = cache_key(url, params)
+
+    entry = _responses.get(key)
+    if entry is not None:
+        _record('l1_hits')
+    else:
+        entry = _fetch_once(session, url, params, key, ttl, service, validate)
+
+    return entry.content if raw else entry.json()
+
+
+def _fetch_once(session, url, params, key, ttl, service, validate):
+    """Run _fetch for key, letting concurrent callers for the same key share one upstream call."""
+    with _inflight_lock:
+        flight = _inflight.get(key)
+        leader = flight is None
+        if leader:
+            flight = _inflight[key] = Future()
+
+    if not leader:
+        return flight.result()
+
+    try:
+        entry = _fetch(session, url, params, key, ttl, service, validate)
+    except BaseException as e:
+        flight.set_exception(e)
+        raise
+    else:
+        flight.set_result(entry)
+        return entry
+    finally:
+        with _inflight_lock:
+            del _inflight[key]
+
+
+def _fetch(session, url, params, key, ttl, service, validate):
+    """Resolve an L1 miss from the shared cache or the network."""
+    stale = _responses.get_stale(key)
+
+    entry, remaining = _shared_get(key)
+    if entry is not None:
+        if remaining > 0:
+            _responses.set(key, entry, remaining)
+            _record('l2_hits')
+            return entry
+        stale = stale or entry
+
+    # Revalidate an expired entry instead of refetching the full body
+    headers = {}
+    if stale is not None:
+        if stale.etag:
+            headers['If-None-Match'] = stale.etag
+        if stale.last_modified:
+            headers['If-Modified-Since'] = stale.last_modified
+
+    response = session.get(url, params=params, headers=headers)
+
+    if response.status_code == 304 and stale is not None:
+        _responses.set(key, stale, ttl)
+        _shared_set(key, stale, ttl)
+        _record('revalidated')
+        return stale
+
+    raise_for_status(response, service)
+
+    entry = CachedResponse(response.content, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+    _record('misses')
+    if validate is not None and not validate(entry.json()):
+        return entry
+
+    _responses.set(key, entry, ttl)
+    _shared_set(key, entry, ttl)
+    return entry
+
+
+def invalidate(url):
+    """Drop every cached response for url, whatever its query params."""
+    _responses.discard_where(lambda key: key[0] == url)
+
+    shared = _get_shared_cache()
+    if shared is None:
+        return
+    index_key = _shared_url_index(url)
+    try:
+        redis_keys = shared.smembers(index_key)
+        shared.delete(index_key, *redis_keys)
+    except Exception as e:
+        current_app.logger.warning(f"Shared HTTP cache invalidation failed: {e}")
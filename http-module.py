@@ -0,0 +1,259 @@
+# tools/_http.py
+"""
+Shared outbound HTTP plumbing for the upstream API tools
+(GitHub, GitLab, Google Maps).
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+from flask import current_app, jsonify
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Shared pool for batched tool calls; its size caps upstream fan-out
+_BULK_POOL = ThreadPoolExecutor(max_workers=20, thread_name_prefix='mcp-bulk')
+
+
+class ToolAPIError(Exception):
+    """An upstream API answered with an error status."""
+
+    def __init__(self, service, status, message):
+        self.status = status
+        super().__init__(f"{service} API error: {message}")
+
+
+def raise_for_status(response, service, ok=(200,)):
+    """
+    Raise ToolAPIError unless the response status is in ok.
+
+    Only the first 512 bytes of the error body are decoded for the message;
+    large error pages are never parsed.
+    """
+    if response.status_code not in ok:
+        raise ToolAPIError(service, response.status_code, response.content[:512].decode('utf-8', 'replace'))
+
+
+def register_error_handlers(blueprint):
+    """Turn exceptions raised in a tool blueprint's direct API routes into JSON error responses."""
+
+    @blueprint.errorhandler(ToolAPIError)
+    def handle_upstream_error(e):
+        # Upstream client errors pass through; upstream failures are a bad gateway
+        return jsonify({'error': str(e)}), e.status if 400 <= e.status < 500 else 502
+
+    @blueprint.errorhandler(requests.RequestException)
+    def handle_transport_error(e):
+        # The upstream could not be reached or did not answer in time
+        return jsonify({'error': str(e)}), 504 if isinstance(e, requests.Timeout) else 502
+
+    @blueprint.errorhandler(Exception)
+    def handle_error(e):
+        return jsonify({'error': str(e)}), 400
+
+
+def _rate_limit_resource(path):
+    """
+    Name the rate-limit budget a request path draws from.
+
+    GitHub keeps separate budgets per X-RateLimit-Resource (search is
+    30/min, core 5000/hr), so an exhausted search budget must not hold up
+    ordinary calls. Other upstreams have one budget, which lands in 'core'.
+    """
+    if path.startswith('/search/code'):
+        return 'code_search'
+    if path.startswith('/search/'):
+        return 'search'
+    if path.startswith('/graphql'):
+        return 'graphql'
+    return 'core'
+
+
+class RateLimiter:
+    """
+    Request budgets tracked from the upstream's rate-limit headers, keyed by
+    (host, resource).
+
+    GitHub sends X-RateLimit-Remaining / X-RateLimit-Reset (plus
+    X-RateLimit-Resource naming the budget) and GitLab sends
+    RateLimit-Remaining / RateLimit-Reset (the reset is a Unix timestamp on
+    both). Each request spends one unit of its budget. Once it is used up,
+    callers wait for the reset window instead of hitting the upstream and
+    getting 403/429 responses.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._budgets = {}  # (host, resource) -> [remaining, reset_at]
+
+    def acquire(self, host, resource, max_wait):
+        """Reserve one request from host's resource budget, sleeping until the window resets if it is spent."""
+        with self._lock:
+            state = self._budgets.get((host, resource))
+            if state is None:
+                return
+            remaining, reset_at = state
+            wait = reset_at - time.time()
+            if remaining > 0 or wait <= 0:
+                state[0] -= 1
+                return
+
+        if wait > max_wait:
+            # The adapter is shared across upstreams, so the host names the service
+            raise ToolAPIError(host, 429, f"rate limit ({resource}) exhausted, resets in {int(wait)}s")
+        # Jitter keeps waiting threads from all firing at the reset instant
+        time.sleep(wait + random.uniform(0, 1))
+
+    def update(self, host, resource, response):
+        """Record the budget reported by a response, if it carries rate-limit headers."""
+        headers = response.headers
+        resource = headers.get('X-RateLimit-Resource', resource)
+        remaining = headers.get('X-RateLimit-Remaining', headers.get('RateLimit-Remaining'))
+        reset_at = headers.get('X-RateLimit-Reset', headers.get('RateLimit-Reset'))
+
+        try:
+            if response.status_code == 429 and remaining is None:
+                remaining = 0
+                reset_at = time.time() + float(headers.get('Retry-After', 60))
+            if remaining is None or reset_at is None:
+                return
+            state = [int(remaining), float(reset_at)]
+        except ValueError:
+            return  # e.g. an HTTP-date Retry-After; the adapter's Retry already honoured it
+
+        with self._lock:
+            self._budgets[(host, resource)] = state
+
+
+_rate_limiter = RateLimiter()
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that applies a default timeout and the per-host rate limit to every request."""
+
+    def __init__(self, *args, timeout=None, rate_limit_max_wait=10.0, **kwargs):
+        self.timeout = timeout
+        self.rate_limit_max_wait = rate_limit_max_wait
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+
+        url = urlsplit(request.url)
+        resource = _rate_limit_resource(url.path)
+        _rate_limiter.acquire(url.netloc, resource, self.rate_limit_max_wait)
+        response = super().send(request, **kwargs)
+        _rate_limiter.update(url.netloc, resource, response)
+        return response
+
+
+_adapter = None
+_adapter_lock = threading.Lock()
+
+
+def _get_adapter(config):
+    """Return the transport adapter shared by every upstream session, creating it on first use."""
+    global _adapter
+    with _adapter_lock:
+        if _adapter is None:
+            _adapter = TimeoutHTTPAdapter(
+                pool_connections=10,
+                pool_maxsize=config.get('HTTP_POOL_MAXSIZE', 20),
+                pool_block=True,
+                max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 502, 503, 504]),
+                timeout=config.get('HTTP_TIMEOUT', 30.0),
+                rate_limit_max_wait=config.get('HTTP_RATE_LIMIT_MAX_WAIT', 10.0)
+            )
+        return _adapter
+
+
+def build_session(config, headers=None, params=None):
+    """
+    Build a pooled requests.Session for an upstream API.
+
+    All sessions mount the same adapter, so GitHub, GitLab and Google Maps
+    draw from one urllib3 pool manager (one keep-alive pool per host) while
+    each session keeps its own credentials. The pools are bounded
+    (pool_block=True), so a burst of calls queues for a kept-alive
+    connection instead of opening throwaway sockets, and every call gets a
+    default timeout so a stalled upstream cannot pin a worker thread
+    indefinitely. Requests also respect the upstream's rate-limit headers
+    (see RateLimiter); cached responses never reach the adapter, so they
+    spend no budget.
+
+    Args:
+        config: The Flask app config
+        headers: Default headers sent with every request
+        params: Default query parameters sent with every request
+
+    Returns:
+        A configured requests.Session
+    """
+    session = requests.Session()
+    adapter = _get_adapter(config)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+
+    if headers:
+        session.headers.update(headers)
+    if params:
+        session.params.update(params)
+
+    return session
+
+
+def run_concurrently(calls):
+    """
+    Run independent tool calls concurrently on the shared bulk pool.
+
+    Each call runs inside the current app context, so handlers can keep
+    using current_app.
+
+    Args:
+        calls: List of (function, args) tuples
+
+    Returns:
+        Each call's return value, or the exception it raised, in input order
+    """
+    app = current_app._get_current_object()
+
+    def run(fn, args):
+        with app.app_context():
+            return fn(*args)
+
+    futures = [_BULK_POOL.submit(run, fn, args) for fn, args in calls]
+
+    results = []
+    for future in futures:
+        try:
+            results.append(future.result())
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+def warmup_upstreams(app, warmups):
+    """
+    Run each tool's warmup function in a background thread.
+
+    This opens pooled keep-alive connections (DNS + TCP + TLS) before the
+    first user-facing call needs them. Failures are logged and ignored.
+
+    Args:
+        app: The Flask application
+        warmups: Callables that each issue one cheap upstream request
+    """
+    def run():
+        with app.app_context():
+            for warmup in warmups:
+                try:
+                    warmup()
+                except Exception as e:
+                    app.logger.warning(f"Upstream warmup failed in {warmup.__module__}: {e}")
+
+    threading.Thread(target=run, name='mcp-http-warmup', daemon=True).start()
@@ -1,31 +1,101 @@
 # config.py
 import os
+from types import SimpleNamespace
+from typing import Final
 from dotenv import load_dotenv
 
 load_dotenv()
 
+_TRUTHY = frozenset({'true', '1', 't', 'yes', 'on'})
+
+
+def _envbool(name, default=False):
+    """Read a boolean flag from the environment."""
+    return os.environ.get(name, str(default)).lower() in _TRUTHY
+
+
 class Config:
     # Flask configuration
     SECRET_KEY = os.environ.get('SECRET_KEY', 'dev-secret-key')
-    DEBUG = os.environ.get('DEBUG', 'False').lower() in ('true', '1', 't')
+    DEBUG: Final[bool] = _envbool('DEBUG', False)
+    TEMPLATES_AUTO_RELOAD = DEBUG  # no template stat() checks outside development
+    # Largest request body accepted (bytes); bigger gateway bodies are rejected before parsing
+    MAX_CONTENT_LENGTH = int(os.environ.get('MAX_CONTENT_LENGTH', str(16 * 1024 * 1024)))
+    # Tools to load, comma-separated; tools not listed are never imported or exposed
+    ENABLED_TOOLS = tuple(
+        name.strip()
+        for name in os.environ.get('ENABLED_TOOLS', 'github,gitlab,gmaps,memory,puppeteer,tiered_memory').split(',')
+        if name.strip()
+    )
+
+    # Outbound HTTP configuration (GitHub, GitLab, Google Maps)
+    HTTP_TIMEOUT = float(os.environ.get('HTTP_TIMEOUT', '30'))  # seconds
+    HTTP_POOL_MAXSIZE = int(os.environ.get('HTTP_POOL_MAXSIZE', '20'))  # connections per host
+    HTTP_CACHE_REDIS_URL = os.environ.get('HTTP_CACHE_REDIS_URL')  # shared response cache (optional)
+    HTTP_RATE_LIMIT_MAX_WAIT = float(os.environ.get('HTTP_RATE_LIMIT_MAX_WAIT', '10'))  # seconds to wait for a rate-limit reset before failing
+    HTTP_WARMUP: Final[bool] = _envbool('HTTP_WARMUP', True)
 
     # GitHub module configuration
     GITHUB_API_URL = os.environ.get('GITHUB_API_URL', 'https://api.github.com')
     GITHUB_TOKEN = os.environ.get('GITHUB_TOKEN')
+    # Revalidate every GET with a conditional request instead of serving from
+    # cache for a TTL; GitHub does not count 304 responses against the rate limit
+    GITHUB_ALWAYS_REVALIDATE: Final[bool] = _envbool('GITHUB_ALWAYS_REVALIDATE', False)
+    GITHUB_HEADERS = {
+        'Authorization': f'token {GITHUB_TOKEN}',
+        'Accept': 'application/vnd.github+json'
+    }
+    # URL templates, filled in with str.format by the handlers
+    GITHUB_URLS = SimpleNamespace(
+        rate_limit=GITHUB_API_URL + '/rate_limit',
+        user_repos=GITHUB_API_URL + '/users/{username}/repos',
+        repo=GITHUB_API_URL + '/repos/{owner}/{repo}',
+        search_repos=GITHUB_API_URL + '/search/repositories',
+        issues=GITHUB_API_URL + '/repos/{owner}/{repo}/issues'
+    )
 
     # GitLab module configuration
     GITLAB_API_URL = os.environ.get('GITLAB_API_URL', 'https://gitlab.com/api/v4')
     GITLAB_TOKEN = os.environ.get('GITLAB_TOKEN')
+    GITLAB_HEADERS = {'Private-Token': GITLAB_TOKEN}
+    # URL templates, filled in with str.format by the handlers
+    GITLAB_URLS = SimpleNamespace(
+        version=GITLAB_API_URL + '/version',
+        projects=GITLAB_API_URL + '/projects',
+        project=GITLAB_API_URL + '/projects/{project_id}',
+        search=GITLAB_API_URL + '/search',
+        issues=GITLAB_API_URL + '/projects/{project_id}/issues',
+        pipelines=GITLAB_API_URL + '/projects/{project_id}/pipelines'
+    )
 
     # Google Maps module configuration
     GMAPS_API_KEY = os.environ.get('GMAPS_API_KEY')
 
     # Legacy Memory module configuration
     MEMORY_DB_URI = os.environ.get('MEMORY_DB_URI', 'sqlite:///memory.db')
+    # Seconds a worker caches get results. The cache is per process, so after a
+    # set or delete other workers may serve the old item for up to this long; 0 disables it
+    MEMORY_CACHE_TTL = float(os.environ.get('MEMORY_CACHE_TTL', '2'))
 
     # Puppeteer module configuration
-    PUPPETEER_HEADLESS = os.environ.get('PUPPETEER_HEADLESS', 'true').lower() in ('true', '1', 't')
+    PUPPETEER_HEADLESS: Final[bool] = _envbool('PUPPETEER_HEADLESS', True)
     CHROME_PATH = os.environ.get('CHROME_PATH', '/usr/bin/chromium-browser')
+    PUPPETEER_SINGLE_PROCESS: Final[bool] = _envbool('PUPPETEER_SINGLE_PROCESS')
+    # Start the Node workers and Chromium at boot instead of on the first render
+    PUPPETEER_WARMUP: Final[bool] = _envbool('PUPPETEER_WARMUP', False)
+    PUPPETEER_WORKERS = int(os.environ.get('PUPPETEER_WORKERS', '1'))  # Node workers per server process
+    # Browser contexts each Node worker renders at once. The limit is per Node worker, and every
+    # gunicorn process runs PUPPETEER_WORKERS of them, so the machine-wide total is
+    # GUNICORN_WORKERS x PUPPETEER_WORKERS x this; keep it small
+    MAX_CONCURRENT_RENDERS = int(os.environ.get('MAX_CONCURRENT_RENDERS', '2'))
+    # Each worker replaces its Chromium after this many renders or this age, before leaks pile up
+    PUPPETEER_MAX_PAGES_PER_BROWSER = int(os.environ.get('PUPPETEER_MAX_PAGES_PER_BROWSER', '500'))
+    PUPPETEER_MAX_BROWSER_AGE = int(os.environ.get('PUPPETEER_MAX_BROWSER_AGE', '900'))  # seconds
+    # Persistent Chromium profiles (disk cache reused across renders); unset keeps renders in incognito contexts
+    PUPPETEER_USER_DATA_DIR = os.environ.get('PUPPETEER_USER_DATA_DIR')
+    PUPPETEER_PROFILE_MAX_AGE_DAYS = int(os.environ.get('PUPPETEER_PROFILE_MAX_AGE_DAYS', '7'))
+    # RAM-backed directory for the Puppeteer workers' temp files (used only if it has room)
+    MCP_TMPFS_DIR = os.environ.get('MCP_TMPFS_DIR', '/dev/shm')
 
     # =========================================================================
     # Tiered Memory System Configuration
@@ -55,7 +125,7 @@ class Config:
 
     # T4 Audit Log Configuration
     MEMORY_T4_PATH = os.environ.get('MEMORY_T4_PATH', 'data/audit')
-    MEMORY_WORM_ENABLED = os.environ.get('MEMORY_WORM_ENABLED', 'false').lower() in ('true', '1', 't')
+    MEMORY_WORM_ENABLED: Final[bool] = _envbool('MEMORY_WORM_ENABLED', False)
 
     # Promotion/Demotion Thresholds
     MEMORY_HEAT_T3_T2 = float(os.environ.get('MEMORY_HEAT_T3_T2', '5.0'))
@@ -21,710 +21,897 @@
 # └── templates/
 
 # app.py
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
+import hashlib
 import json
 import os
+from typing import Union
+import msgspec
+import orjson
 from config import Config
-from tools.github_tool import github_routes
-from tools.gitlab_tool import gitlab_routes
-from tools.gmaps_tool import gmaps_routes
-from tools.memory_tool import memory_routes
-from tools.puppeteer_tool import puppeteer_routes
-from tiered_memory.mcp_interface import tiered_memory_routes
+from tools import register_tools
+from tools._http import run_concurrently, warmup_upstreams
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson, so jsonify() serializes in C"""
+
+    # Datetimes are written natively in ISO 8601 (naive values without an offset,
+    # exactly like isoformat()); numpy arrays and scalars from tiered memory too
+    _OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self._OPTIONS).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
 
 app = Flask(__name__)
-CORS(app)
+app.json = OrjsonProvider(app)
+# CORS only for the browser-facing direct tool routes; the MCP gateway is
+# called by MCP clients and services, so it skips the per-request CORS work
+CORS(app, resources={r"/tool/*": {"origins": "*"}})
 app.config.from_object(Config)
 
-# Register tool routes
-app.register_blueprint(github_routes, url_prefix='/tool/github')
-app.register_blueprint(gitlab_routes, url_prefix='/tool/gitlab')
-app.register_blueprint(gmaps_routes, url_prefix='/tool/gmaps')
-app.register_blueprint(memory_routes, url_prefix='/tool/memory')
-app.register_blueprint(puppeteer_routes, url_prefix='/tool/puppeteer')
+# Import the enabled tools (including tiered memory) and register their routes
+TOOLS = register_tools(app)
+
+# Pre-establish upstream API connections so the first call skips the handshake
+if app.config['HTTP_WARMUP']:
+    warmup_upstreams(app, [module.warmup for module in TOOLS.values() if hasattr(module, 'warmup')])
+
+# Launch the Puppeteer workers at boot only when asked: every gunicorn worker
+# would start its own Node process and Chromium, so by default they start on
+# the first render
+if app.config['PUPPETEER_WARMUP'] and 'puppeteer' in TOOLS:
+    warmup_upstreams(app, [TOOLS['puppeteer'].prestart])
+
+# Maximum number of calls accepted in one batched gateway request
+MAX_BATCH_SIZE = 50
+
+# Gateway dispatch: tool name -> handle_action function
+TOOL_HANDLERS = {name: module.handle_action for name, module in TOOLS.items()}
+
+class GatewayRequest(msgspec.Struct):
+    """A single MCP gateway call, parsed and type-checked in one pass"""
+    tool: str = ""
+    action: str = ""
+    parameters: dict = {}
+
+# A gateway body is one call (an object) or a batch of calls (an array),
+# sent as JSON or, by internal callers that opt in, as msgpack
+_gateway_decoder = msgspec.json.Decoder(Union[GatewayRequest, list])
+_gateway_msgpack_decoder = msgspec.msgpack.Decoder(Union[GatewayRequest, list])
+
+MSGPACK_MIMETYPE = 'application/msgpack'
+# JSON first, so it wins unless the client explicitly prefers msgpack
+_GATEWAY_MIMETYPES = ('application/json', MSGPACK_MIMETYPE)
+
+def _msgpack_default(obj):
+    """Encode values msgpack has no type for: numpy values from tiered memory, then whatever jsonify accepts"""
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    return app.json.default(obj)
+
+_gateway_msgpack_encoder = msgspec.msgpack.Encoder(enc_hook=_msgpack_default)
 
-# Register tiered memory routes
-app.register_blueprint(tiered_memory_routes, url_prefix='/tool/tiered_memory')
+# Bodies for the fixed rejection paths, encoded once at import. Each request
+# still gets its own Response, since Response objects are mutable and must
+# not be shared between concurrent requests
+_ERR_BODY_REQUIRED = b'{"error":"Request body is required"}'
+_ERR_TOOL_REQUIRED = b'{"error":"Tool name is required"}'
+_ERR_ACTION_REQUIRED = b'{"error":"Action is required"}'
+
+def error_response(body, status=400):
+    """Wrap a pre-encoded JSON error body in a response"""
+    return Response(body, status=status, mimetype='application/json')
+
+def gateway_response(payload, status=200):
+    """Serialize an MCP response as msgpack if the client's Accept header prefers it, else as JSON"""
+    if request.accept_mimetypes.best_match(_GATEWAY_MIMETYPES) == MSGPACK_MIMETYPE:
+        return Response(_gateway_msgpack_encoder.encode(payload), status=status, mimetype=MSGPACK_MIMETYPE)
+    return jsonify(payload), status
+
+def mcp_success(tool_name, action, result):
+    """Format a successful tool call according to MCP"""
+    return {
+        "tool": tool_name,
+        "action": action,
+        "status": "success",
+        "result": result
+    }
+
+def mcp_error(tool_name, action, error):
+    """Format a failed tool call according to MCP"""
+    return {
+        "tool": tool_name,
+        "action": action,
+        "status": "error",
+        "error": {
+            "type": type(error).__name__,
+            "message": str(error)
+        }
+    }
 
 # MCP Gateway endpoint
-@app.route('/mcp/gateway', methods=['POST'])
+@app.route('/mcp/gateway', methods=['POST'], strict_slashes=False)
 def mcp_gateway():
-    data = request.get_json()
+    # Refuse oversized bodies up front rather than spend a worker parsing them
+    if request.content_length and request.content_length > app.config['MAX_CONTENT_LENGTH']:
+        return error_response(orjson.dumps({"error": f"Request body exceeds {app.config['MAX_CONTENT_LENGTH']} bytes"}), 413)
     
-    if not data:
-        return jsonify({"error": "Request body is required"}), 400
+    body = request.get_data(cache=False)
+    if not body:
+        return error_response(_ERR_BODY_REQUIRED)
     
-    # Parse the MCP request
-    tool_name = data.get('tool')
-    action = data.get('action')
-    parameters = data.get('parameters', {})
+    # Parse and validate the MCP request
+    decoder = _gateway_msgpack_decoder if request.mimetype == MSGPACK_MIMETYPE else _gateway_decoder
+    try:
+        data = decoder.decode(body)
+    except msgspec.DecodeError as e:
+        return error_response(orjson.dumps({"error": f"Invalid request body: {e}"}))
+    
+    # A JSON array is a batch of independent calls
+    if isinstance(data, list):
+        if not data:
+            return error_response(_ERR_BODY_REQUIRED)
+        return mcp_gateway_batch(data)
+    
+    tool_name = data.tool
+    action = data.action
+    parameters = data.parameters
     
     # Check for required fields
     if not tool_name:
-        return jsonify({"error": "Tool name is required"}), 400
+        return error_response(_ERR_TOOL_REQUIRED)
     if not action:
-        return jsonify({"error": "Action is required"}), 400
+        return error_response(_ERR_ACTION_REQUIRED)
     
     # Route to the appropriate tool
+    handler = TOOL_HANDLERS.get(tool_name)
+    if handler is None:
+        return error_response(orjson.dumps({"error": f"Unknown tool: {tool_name}"}), 404)
+    
     try:
-        # Construct the tool endpoint URL
-        tool_url = f"/tool/{tool_name}/{action}"
-        
-        # Forward the request to the tool handler
-        # In a real implementation, you'd use Flask's test_client or requests library
-        # But for this demo, we'll simulate the routing
-        if tool_name == "github":
-            from tools.github_tool import handle_action
-            result = handle_action(action, parameters)
-        elif tool_name == "gitlab":
-            from tools.gitlab_tool import handle_action
-            result = handle_action(action, parameters)
-        elif tool_name == "gmaps":
-            from tools.gmaps_tool import handle_action
-            result = handle_action(action, parameters)
-        elif tool_name == "memory":
-            from tools.memory_tool import handle_action
-            result = handle_action(action, parameters)
-        elif tool_name == "puppeteer":
-            from tools.puppeteer_tool import handle_action
-            result = handle_action(action, parameters)
-        elif tool_name == "tiered_memory":
-            from tiered_memory.mcp_interface import handle_action
-            result = handle_action(action, parameters)
-        else:
-            return jsonify({"error": f"Unknown tool: {tool_name}"}), 404
-        
-        # Format the response according to MCP
-        mcp_response = {
-            "tool": tool_name,
-            "action": action,
-            "status": "success",
-            "result": result
-        }
-        
-        return jsonify(mcp_response)
+        result = handler(action, parameters)
+        return gateway_response(mcp_success(tool_name, action, result))
     
     except Exception as e:
         # Handle errors according to MCP
-        mcp_error = {
-            "tool": tool_name,
-            "action": action,
-            "status": "error",
-            "error": {
-                "type": type(e).__name__,
-                "message": str(e)
-            }
-        }
-        
-        return jsonify(mcp_error), 500
+        return gateway_response(mcp_error(tool_name, action, e), 500)
 
-# MCP manifest endpoint
-@app.route('/mcp/manifest', methods=['GET'])
-def mcp_manifest():
-    """Returns the MCP manifest describing available tools"""
+def mcp_gateway_batch(calls):
+    """
+    Run a batch of independent MCP calls concurrently.
+    
+    Returns one MCP response per call, in request order. A failing call
+    is reported in its own slot and does not fail the batch.
+    """
+    if len(calls) > MAX_BATCH_SIZE:
+        return error_response(orjson.dumps({"error": f"Batch size exceeds the maximum of {MAX_BATCH_SIZE}"}))
+    
+    responses = [None] * len(calls)
+    pending = []
+    
+    for index, call in enumerate(calls):
+        if not isinstance(call, dict):
+            responses[index] = mcp_error(None, None, ValueError("Each batch entry must be an object"))
+            continue
+        
+        tool_name = call.get('tool')
+        action = call.get('action')
+        parameters = call.get('parameters', {})
+        
+        if not tool_name:
+            responses[index] = mcp_error(tool_name, action, ValueError("Tool name is required"))
+        elif not action:
+            responses[index] = mcp_error(tool_name, action, ValueError("Action is required"))
+        else:
+            handler = TOOL_HANDLERS.get(tool_name)
+            if handler is None:
+                responses[index] = mcp_error(tool_name, action, LookupError(f"Unknown tool: {tool_name}"))
+            else:
+                pending.append((index, tool_name, action, handler, parameters))
+    
+    results = run_concurrently([(handler, (action, parameters)) for _, _, action, handler, parameters in pending])
     
-    manifest = {
-        "manifestVersion": "1.0",
-        "tools": {
-            "github": {
-                "actions": {
-                    "listRepos": {
-                        "description": "List repositories for a user or organization",
-                        "parameters": {
-                            "username": {
-                                "type": "string",
-                                "description": "GitHub username or organization name"
-                            }
-                        },
-                        "returns": {
+    for (index, tool_name, action, _, _), result in zip(pending, results):
+        if isinstance(result, Exception):
+            responses[index] = mcp_error(tool_name, action, result)
+        else:
+            responses[index] = mcp_success(tool_name, action, result)
+    
+    return gateway_response(responses)
+
+# MCP manifest, describing the available tools
+_MANIFEST = {
+    "manifestVersion": "1.0",
+    "tools": {
+        "github": {
+            "actions": {
+                "listRepos": {
+                    "description": "List repositories for a user or organization",
+                    "parameters": {
+                        "username": {
+                            "type": "string",
+                            "description": "GitHub username or organization name"
+                        },
+                        "fields": {
                             "type": "array",
-                            "description": "List of repository objects"
+                            "description": "Only return these fields of each repository (e.g. [\"id\", \"name\"]); all fields if omitted"
+                        },
+                        "limit": {
+                            "type": "integer",
+                            "description": "Maximum number of repositories to return",
+                            "default": 100
                         }
                     },
-                    "getRepo": {
-                        "description": "Get details for a specific repository",
-                        "parameters": {
-                            "owner": {
-                                "type": "string",
-                                "description": "Repository owner"
-                            },
-                            "repo": {
-                                "type": "string",
-                                "description": "Repository name"
-                            }
-                        },
-                        "returns": {
-                            "type": "object",
-                            "description": "Repository details"
+                    "returns": {
+                        "type": "array",
+                        "description": "List of repository objects"
+                    }
+                },
+                "getRepo": {
+                    "description": "Get details for a specific repository",
+                    "parameters": {
+                        "owner": {
+                            "type": "string",
+                            "description": "Repository owner"
+                        },
+                        "repo": {
+                            "type": "string",
+                            "description": "Repository name"
                         }
                     },
-                    "searchRepos": {
-                        "description": "Search for repositories",
-                        "parameters": {
-                            "query": {
-                                "type": "string",
-                                "description": "Search query"
-                            }
-                        },
-                        "returns": {
-                            "type": "object",
-                            "description": "Search results"
+                    "returns": {
+                        "type": "object",
+                        "description": "Repository details"
+                    }
+                },
+                "searchRepos": {
+                    "description": "Search for repositories",
+                    "parameters": {
+                        "query": {
+                            "type": "string",
+                            "description": "Search query"
+                        },
+                        "fields": {
+                            "type": "array",
+                            "description": "Only return these fields of each result item (e.g. [\"id\", \"name\"]); all fields if omitted"
                         }
                     },
-                    "getIssues": {
-                        "description": "Get issues for a repository",
-                        "parameters": {
-                            "owner": {
-                                "type": "string",
-                                "description": "Repository owner"
-                            },
-                            "repo": {
-                                "type": "string",
-                                "description": "Repository name"
-                            },
-                            "state": {
-                                "type": "string",
-                                "description": "Issue state (open, closed, all)",
-                                "default": "open"
-                            }
-                        },
-                        "returns": {
+                    "returns": {
+                        "type": "object",
+                        "description": "Search results"
+                    }
+                },
+                "getIssues": {
+                    "description": "Get issues for a repository",
+                    "parameters": {
+                        "owner": {
+                            "type": "string",
+                            "description": "Repository owner"
+                        },
+                        "repo": {
+                            "type": "string",
+                            "description": "Repository name"
+                        },
+                        "state": {
+                            "type": "string",
+                            "description": "Issue state (open, closed, all)",
+                            "default": "open"
+                        },
+                        "fields": {
                             "type": "array",
-                            "description": "List of issue objects"
+                            "description": "Only return these fields of each issue (e.g. [\"number\", \"title\"]); all fields if omitted"
+                        },
+                        "limit": {
+                            "type": "integer",
+                            "description": "Maximum number of issues to return",
+                            "default": 100
                         }
                     },
-                    "createIssue": {
-                        "description": "Create a new issue in a repository",
-                        "parameters": {
-                            "owner": {
-                                "type": "string",
-                                "description": "Repository owner"
-                            },
-                            "repo": {
-                                "type": "string",
-                                "description": "Repository name"
-                            },
-                            "title": {
-                                "type": "string",
-                                "description": "Issue title"
-                            },
-                            "body": {
-                                "type": "string",
-                                "description": "Issue body"
-                            }
-                        },
-                        "returns": {
-                            "type": "object",
-                            "description": "Created issue"
+                    "returns": {
+                        "type": "array",
+                        "description": "List of issue objects"
+                    }
+                },
+                "createIssue": {
+                    "description": "Create a new issue in a repository",
+                    "parameters": {
+                        "owner": {
+                            "type": "string",
+                            "description": "Repository owner"
+                        },
+                        "repo": {
+                            "type": "string",
+                            "description": "Repository name"
+                        },
+                        "title": {
+                            "type": "string",
+                            "description": "Issue title"
+                        },
+                        "body": {
+                            "type": "string",
+                            "description": "Issue body"
                         }
+                    },
+                    "returns": {
+                        "type": "object",
+                        "description": "Created issue"
                     }
                 }
-            },
-            "gitlab": {
-                "actions": {
-                    "listProjects": {
-                        "description": "List all projects accessible by the authenticated user",
-                        "parameters": {},
-                        "returns": {
-                            "type": "array",
-                            "description": "List of project objects"
+            }
+        },
+        "gitlab": {
+            "actions": {
+                "listProjects": {
+                    "description": "List all projects accessible by the authenticated user",
+                    "parameters": {},
+                    "returns": {
+                        "type": "array",
+                        "description": "List of project objects"
+                    }
+                },
+                "getProject": {
+                    "description": "Get details for a specific project",
+                    "parameters": {
+                        "projectId": {
+                            "type": "string",
+                            "description": "GitLab project ID"
                         }
                     },
-                    "getProject": {
-                        "description": "Get details for a specific project",
-                        "parameters": {
-                            "projectId": {
-                                "type": "string",
-                                "description": "GitLab project ID"
-                            }
-                        },
-                        "returns": {
-                            "type": "object",
-                            "description": "Project details"
+                    "returns": {
+                        "type": "object",
+                        "description": "Project details"
+                    }
+                },
+                "searchProjects": {
+                    "description": "Search for projects on GitLab",
+                    "parameters": {
+                        "query": {
+                            "type": "string",
+                            "description": "Search query"
                         }
                     },
-                    "searchProjects": {
-                        "description": "Search for projects on GitLab",
-                        "parameters": {
-                            "query": {
-                                "type": "string",
-                                "description": "Search query"
-                            }
-                        },
-                        "returns": {
-                            "type": "object",
-                            "description": "Search results"
-                        }
+                    "returns": {
+                        "type": "object",
+                        "description": "Search results"
                     }
                 }
-            },
-            "gmaps": {
-                "actions": {
-                    "geocode": {
-                        "description": "Convert an address to geographic coordinates",
-                        "parameters": {
-                            "address": {
-                                "type": "string",
-                                "description": "Address to geocode"
-                            }
-                        },
-                        "returns": {
-                            "type": "object",
-                            "description": "Geocoding results"
+            }
+        },
+        "gmaps": {
+            "actions": {
+                "geocode": {
+                    "description": "Convert an address to geographic coordinates",
+                    "parameters": {
+                        "address": {
+                            "type": "string",
+                            "description": "Address to geocode"
                         }
                     },
-                    "reverseGeocode": {
-                        "description": "Convert geographic coordinates to an address",
-                        "parameters": {
-                            "lat": {
-                                "type": "number",
-                                "description": "Latitude"
-                            },
-                            "lng": {
-                                "type": "number",
-                                "description": "Longitude"
-                            }
-                        },
-                        "returns": {
-                            "type": "object",
-                            "description": "Reverse geocoding results"
+                    "returns": {
+                        "type": "object",
+                        "description": "Geocoding results"
+                    }
+                },
+                "reverseGeocode": {
+                    "description": "Convert geographic coordinates to an address",
+                    "parameters": {
+                        "lat": {
+                            "type": "number",
+                            "description": "Latitude"
+                        },
+                        "lng": {
+                            "type": "number",
+                            "description": "Longitude"
                         }
                     },
-                    "getDirections": {
-                        "description": "Get directions between two locations",
-                        "parameters": {
-                            "origin": {
-                                "type": "string",
-                                "description": "Origin address or coordinates"
-                            },
-                            "destination": {
-                                "type": "string",
-                                "description": "Destination address or coordinates"
-                            },
-                            "mode": {
-                                "type": "string",
-                                "description": "Travel mode (driving, walking, bicycling, transit)",
-                                "default": "driving"
-                            }
-                        },
-                        "returns": {
-                            "type": "object",
-                            "description": "Directions results"
+                    "returns": {
+                        "type": "object",
+                        "description": "Reverse geocoding results"
+                    }
+                },
+                "getDirections": {
+                    "description": "Get directions between two locations",
+                    "parameters": {
+                        "origin": {
+                            "type": "string",
+                            "description": "Origin address or coordinates"
+                        },
+                        "destination": {
+                            "type": "string",
+                            "description": "Destination address or coordinates"
+                        },
+                        "mode": {
+                            "type": "string",
+                            "description": "Travel mode (driving, walking, bicycling, transit)",
+                            "default": "driving"
                         }
+                    },
+                    "returns": {
+                        "type": "object",
+                        "description": "Directions results"
                     }
                 }
-            },
-            "memory": {
-                "actions": {
-                    "get": {
-                        "description": "Get a memory item by key",
-                        "parameters": {
-                            "key": {
-                                "type": "string",
-                                "description": "Memory item key"
-                            }
-                        },
-                        "returns": {
-                            "type": "object",
-                            "description": "Memory item"
+            }
+        },
+        "memory": {
+            "actions": {
+                "get": {
+                    "description": "Get a memory item by key",
+                    "parameters": {
+                        "key": {
+                            "type": "string",
+                            "description": "Memory item key"
                         }
                     },
-                    "set": {
-                        "description": "Create or update a memory item",
-                        "parameters": {
-                            "key": {
-                                "type": "string",
-                                "description": "Memory item key"
-                            },
-                            "value": {
-                                "type": "any",
-                                "description": "Memory item value"
-                            },
-                            "metadata": {
-                                "type": "object",
-                                "description": "Optional metadata",
-                                "default": {}
-                            }
-                        },
-                        "returns": {
+                    "returns": {
+                        "type": "object",
+                        "description": "Memory item"
+                    }
+                },
+                "set": {
+                    "description": "Create or update a memory item",
+                    "parameters": {
+                        "key": {
+                            "type": "string",
+                            "description": "Memory item key"
+                        },
+                        "value": {
+                            "type": "any",
+                            "description": "Memory item value"
+                        },
+                        "metadata": {
                             "type": "object",
-                            "description": "Created or updated memory item"
+                            "description": "Optional metadata",
+                            "default": {}
                         }
                     },
-                    "delete": {
-                        "description": "Delete a memory item by key",
-                        "parameters": {
-                            "key": {
-                                "type": "string",
-                                "description": "Memory item key"
-                            }
-                        },
-                        "returns": {
-                            "type": "object",
-                            "description": "Deletion result"
+                    "returns": {
+                        "type": "object",
+                        "description": "Created or updated memory item"
+                    }
+                },
+                "delete": {
+                    "description": "Delete a memory item by key",
+                    "parameters": {
+                        "key": {
+                            "type": "string",
+                            "description": "Memory item key"
                         }
                     },
-                    "list": {
-                        "description": "List all memory items, with optional filtering",
-                        "parameters": {
-                            "filterKey": {
-                                "type": "string",
-                                "description": "Optional key filter"
-                            },
-                            "limit": {
-                                "type": "number",
-                                "description": "Maximum number of items to return",
-                                "default": 100
-                            },
-                            "offset": {
-                                "type": "number",
-                                "description": "Number of items to skip",
-                                "default": 0
-                            }
-                        },
-                        "returns": {
-                            "type": "object",
-                            "description": "List of memory items with pagination info"
+                    "returns": {
+                        "type": "object",
+                        "description": "Deletion result"
+                    }
+                },
+                "list": {
+                    "description": "List all memory items, with optional filtering",
+                    "parameters": {
+                        "filterKey": {
+                            "type": "string",
+                            "description": "Optional key filter"
+                        },
+                        "limit": {
+                            "type": "number",
+                            "description": "Maximum number of items to return (1-1000)",
+                            "default": 100
+                        },
+                        "offset": {
+                            "type": "number",
+                            "description": "Number of items to skip",
+                            "default": 0
                         }
+                    },
+                    "returns": {
+                        "type": "object",
+                        "description": "List of memory items with pagination info"
                     }
                 }
-            },
-            "puppeteer": {
-                "actions": {
-                    "screenshot": {
-                        "description": "Take a screenshot of a webpage",
-                        "parameters": {
-                            "url": {
-                                "type": "string",
-                                "description": "URL to screenshot"
-                            },
-                            "fullPage": {
-                                "type": "boolean",
-                                "description": "Whether to capture the full page",
-                                "default": False
-                            },
-                            "type": {
-                                "type": "string",
-                                "description": "Image type (png or jpeg)",
-                                "default": "png"
-                            }
-                        },
-                        "returns": {
-                            "type": "object",
-                            "description": "Screenshot result with base64-encoded image"
+            }
+        },
+        "puppeteer": {
+            "actions": {
+                "screenshot": {
+                    "description": "Take a screenshot of a webpage",
+                    "parameters": {
+                        "url": {
+                            "type": "string",
+                            "description": "URL to screenshot"
+                        },
+                        "fullPage": {
+                            "type": "boolean",
+                            "description": "Whether to capture the full page",
+                            "default": False
+                        },
+                        "type": {
+                            "type": "string",
+                            "description": "Image type (png or jpeg)",
+                            "default": "png"
+                        },
+                        "blockResources": {
+                            "type": "array",
+                            "description": "Resource types to skip loading (e.g. [\"image\", \"font\"]); defaults to [\"media\"]; ignored when the server uses a persistent profile cache"
+                        },
+                        "waitUntil": {
+                            "type": "string",
+                            "description": "Page load event to wait for: load, domcontentloaded, networkidle0 or networkidle2",
+                            "default": "load"
+                        },
+                        "waitForSelector": {
+                            "type": "string",
+                            "description": "CSS selector to wait for before capturing; the preferred readiness signal"
                         }
                     },
-                    "pdf": {
-                        "description": "Generate a PDF of a webpage",
-                        "parameters": {
-                            "url": {
-                                "type": "string",
-                                "description": "URL to convert to PDF"
-                            },
-                            "printBackground": {
-                                "type": "boolean",
-                                "description": "Whether to print background graphics",
-                                "default": True
-                            }
-                        },
-                        "returns": {
-                            "type": "object",
-                            "description": "PDF result with base64-encoded document"
+                    "returns": {
+                        "type": "object",
+                        "description": "Screenshot result with base64-encoded image"
+                    }
+                },
+                "pdf": {
+                    "description": "Generate a PDF of a webpage",
+                    "parameters": {
+                        "url": {
+                            "type": "string",
+                            "description": "URL to convert to PDF"
+                        },
+                        "printBackground": {
+                            "type": "boolean",
+                            "description": "Whether to print background graphics",
+                            "default": True
+                        },
+                        "blockResources": {
+                            "type": "array",
+                            "description": "Resource types to skip loading (e.g. [\"image\", \"font\"]); defaults to [\"media\"]; ignored when the server uses a persistent profile cache"
+                        },
+                        "waitUntil": {
+                            "type": "string",
+                            "description": "Page load event to wait for: load, domcontentloaded, networkidle0 or networkidle2",
+                            "default": "load"
+                        },
+                        "waitForSelector": {
+                            "type": "string",
+                            "description": "CSS selector to wait for before capturing; the preferred readiness signal"
                         }
                     },
-                    "extract": {
-                        "description": "Extract content from a webpage",
-                        "parameters": {
-                            "url": {
-                                "type": "string",
-                                "description": "URL to extract content from"
-                            },
-                            "selector": {
-                                "type": "string",
-                                "description": "CSS selector for content to extract"
-                            }
-                        },
-                        "returns": {
-                            "type": "object",
-                            "description": "Extracted content"
+                    "returns": {
+                        "type": "object",
+                        "description": "PDF result with base64-encoded document"
+                    }
+                },
+                "extract": {
+                    "description": "Extract content from a webpage",
+                    "parameters": {
+                        "url": {
+                            "type": "string",
+                            "description": "URL to extract content from"
+                        },
+                        "selector": {
+                            "type": "string",
+                            "description": "CSS selector for content to extract"
+                        },
+                        "fields": {
+                            "type": "array",
+                            "description": "With selector: return only these attributes of each element (e.g. [\"href\", \"text\"]); \"text\" and \"html\" give its text and markup"
+                        },
+                        "maxLength": {
+                            "type": "number",
+                            "description": "Maximum characters returned per string; longer content is truncated",
+                            "default": 1048576
+                        },
+                        "blockResources": {
+                            "type": "array",
+                            "description": "Resource types to skip loading (e.g. [\"image\", \"font\"]); defaults to [\"image\", \"media\", \"font\"]; ignored when the server uses a persistent profile cache"
+                        },
+                        "waitUntil": {
+                            "type": "string",
+                            "description": "Page load event to wait for: load, domcontentloaded, networkidle0 or networkidle2",
+                            "default": "domcontentloaded"
+                        },
+                        "waitForSelector": {
+                            "type": "string",
+                            "description": "CSS selector to wait for before capturing; the preferred readiness signal"
                         }
+                    },
+                    "returns": {
+                        "type": "object",
+                        "description": "Extracted content"
                     }
                 }
-            },
-            "tiered_memory": {
-                "description": "Tiered memory system with T0-T4 storage, promotion/demotion, versioning, and hybrid search",
-                "actions": {
-                    "search": {
-                        "description": "Hybrid search across memory tiers (T0-T3)",
-                        "parameters": {
-                            "query": {
-                                "type": "string",
-                                "description": "Search query (natural language)",
-                                "required": True
-                            },
-                            "scope": {
-                                "type": "object",
-                                "description": "Filter scope (e.g., {source_type: 'github'})"
-                            },
-                            "domain_tags": {
-                                "type": "array",
-                                "description": "Filter by domain tags (e.g., ['finance', 'code'])"
-                            },
-                            "time_range": {
-                                "type": "object",
-                                "description": "{start: ISO, end: ISO} time range filter"
-                            },
-                            "k": {
-                                "type": "number",
-                                "description": "Number of results",
-                                "default": 10
-                            },
-                            "budget_ms": {
-                                "type": "number",
-                                "description": "Time budget in milliseconds",
-                                "default": 500
-                            },
-                            "session_id": {
-                                "type": "string",
-                                "description": "Session ID for T0 access"
-                            }
-                        },
-                        "returns": {
+            }
+        },
+        "tiered_memory": {
+            "description": "Tiered memory system with T0-T4 storage, promotion/demotion, versioning, and hybrid search",
+            "actions": {
+                "search": {
+                    "description": "Hybrid search across memory tiers (T0-T3)",
+                    "parameters": {
+                        "query": {
+                            "type": "string",
+                            "description": "Search query (natural language)",
+                            "required": True
+                        },
+                        "scope": {
                             "type": "object",
-                            "description": "Search results with context pack references"
-                        }
-                    },
-                    "get": {
-                        "description": "Retrieve a memory object by ID",
-                        "parameters": {
-                            "object_id": {
-                                "type": "string",
-                                "description": "Memory object ID",
-                                "required": True
-                            },
-                            "view": {
-                                "type": "string",
-                                "description": "View type: snippet, summary, or raw",
-                                "default": "summary"
-                            },
-                            "session_id": {
-                                "type": "string",
-                                "description": "Session ID for T0 access"
-                            }
-                        },
-                        "returns": {
+                            "description": "Filter scope (e.g., {source_type: 'github'})"
+                        },
+                        "domain_tags": {
+                            "type": "array",
+                            "description": "Filter by domain tags (e.g., ['finance', 'code'])"
+                        },
+                        "time_range": {
                             "type": "object",
-                            "description": "Memory object"
+                            "description": "{start: ISO, end: ISO} time range filter"
+                        },
+                        "k": {
+                            "type": "number",
+                            "description": "Number of results",
+                            "default": 10
+                        },
+                        "budget_ms": {
+                            "type": "number",
+                            "description": "Time budget in milliseconds",
+                            "default": 500
+                        },
+                        "session_id": {
+                            "type": "string",
+                            "description": "Session ID for T0 access"
                         }
                     },
-                    "write_event": {
-                        "description": "Write an event (episodic/procedural) to memory",
-                        "parameters": {
-                            "event_type": {
-                                "type": "string",
-                                "description": "Event type (tool_call, correction, preference)",
-                                "required": True
-                            },
-                            "payload": {
-                                "type": "any",
-                                "description": "Event content",
-                                "required": True
-                            },
-                            "metadata": {
-                                "type": "object",
-                                "description": "Additional metadata (object_type, domain_tags, trust_level)"
-                            },
-                            "session_id": {
-                                "type": "string",
-                                "description": "Session ID"
-                            }
-                        },
-                        "returns": {
-                            "type": "object",
-                            "description": "Created event with ID and tier"
+                    "returns": {
+                        "type": "object",
+                        "description": "Search results with context pack references"
+                    }
+                },
+                "get": {
+                    "description": "Retrieve a memory object by ID",
+                    "parameters": {
+                        "object_id": {
+                            "type": "string",
+                            "description": "Memory object ID",
+                            "required": True
+                        },
+                        "view": {
+                            "type": "string",
+                            "description": "View type: snippet, summary, or raw",
+                            "default": "summary"
+                        },
+                        "session_id": {
+                            "type": "string",
+                            "description": "Session ID for T0 access"
                         }
                     },
-                    "pin": {
-                        "description": "Pin an object to a specific tier (prevent demotion)",
-                        "parameters": {
-                            "object_id": {
-                                "type": "string",
-                                "description": "Object ID to pin",
-                                "required": True
-                            },
-                            "tier_target": {
-                                "type": "string",
-                                "description": "Target tier (t1 or t2)",
-                                "default": "t1"
-                            }
-                        },
-                        "returns": {
+                    "returns": {
+                        "type": "object",
+                        "description": "Memory object"
+                    }
+                },
+                "write_event": {
+                    "description": "Write an event (episodic/procedural) to memory",
+                    "parameters": {
+                        "event_type": {
+                            "type": "string",
+                            "description": "Event type (tool_call, correction, preference)",
+                            "required": True
+                        },
+                        "payload": {
+                            "type": "any",
+                            "description": "Event content",
+                            "required": True
+                        },
+                        "metadata": {
                             "type": "object",
-                            "description": "Pin status"
+                            "description": "Additional metadata (object_type, domain_tags, trust_level)"
+                        },
+                        "session_id": {
+                            "type": "string",
+                            "description": "Session ID"
                         }
                     },
-                    "unpin": {
-                        "description": "Remove pin from an object",
-                        "parameters": {
-                            "object_id": {
-                                "type": "string",
-                                "description": "Object ID to unpin",
-                                "required": True
-                            }
-                        },
-                        "returns": {
-                            "type": "object",
-                            "description": "Unpin status"
+                    "returns": {
+                        "type": "object",
+                        "description": "Created event with ID and tier"
+                    }
+                },
+                "pin": {
+                    "description": "Pin an object to a specific tier (prevent demotion)",
+                    "parameters": {
+                        "object_id": {
+                            "type": "string",
+                            "description": "Object ID to pin",
+                            "required": True
+                        },
+                        "tier_target": {
+                            "type": "string",
+                            "description": "Target tier (t1 or t2)",
+                            "default": "t1"
                         }
                     },
-                    "context_pack": {
-                        "description": "Assemble a token-budgeted context pack",
-                        "parameters": {
-                            "query": {
-                                "type": "string",
-                                "description": "Query to build context for",
-                                "required": True
-                            },
-                            "scope": {
-                                "type": "object",
-                                "description": "Scope filters"
-                            },
-                            "token_budget": {
-                                "type": "number",
-                                "description": "Maximum tokens",
-                                "default": 4000
-                            },
-                            "session_id": {
-                                "type": "string",
-                                "description": "Session ID"
-                            }
-                        },
-                        "returns": {
-                            "type": "object",
-                            "description": "Context pack with summary, snippets, facts, validity notes"
+                    "returns": {
+                        "type": "object",
+                        "description": "Pin status"
+                    }
+                },
+                "unpin": {
+                    "description": "Remove pin from an object",
+                    "parameters": {
+                        "object_id": {
+                            "type": "string",
+                            "description": "Object ID to unpin",
+                            "required": True
                         }
                     },
-                    "version": {
-                        "description": "Create a new version of an object (don't overwrite)",
-                        "parameters": {
-                            "object_id": {
-                                "type": "string",
-                                "description": "Object to version",
-                                "required": True
-                            },
-                            "new_content": {
-                                "type": "string",
-                                "description": "New content",
-                                "required": True
-                            },
-                            "metadata": {
-                                "type": "object",
-                                "description": "Additional metadata"
-                            },
-                            "change_reason": {
-                                "type": "string",
-                                "description": "Why the change was made"
-                            }
-                        },
-                        "returns": {
+                    "returns": {
+                        "type": "object",
+                        "description": "Unpin status"
+                    }
+                },
+                "context_pack": {
+                    "description": "Assemble a token-budgeted context pack",
+                    "parameters": {
+                        "query": {
+                            "type": "string",
+                            "description": "Query to build context for",
+                            "required": True
+                        },
+                        "scope": {
                             "type": "object",
-                            "description": "Version info with old/new IDs"
+                            "description": "Scope filters"
+                        },
+                        "token_budget": {
+                            "type": "number",
+                            "description": "Maximum tokens",
+                            "default": 4000
+                        },
+                        "session_id": {
+                            "type": "string",
+                            "description": "Session ID"
                         }
                     },
-                    "get_versions": {
-                        "description": "Get version history for an object",
-                        "parameters": {
-                            "object_id": {
-                                "type": "string",
-                                "description": "Object ID",
-                                "required": True
-                            },
-                            "include_content": {
-                                "type": "boolean",
-                                "description": "Include content in response",
-                                "default": False
-                            }
-                        },
-                        "returns": {
+                    "returns": {
+                        "type": "object",
+                        "description": "Context pack with summary, snippets, facts, validity notes"
+                    }
+                },
+                "version": {
+                    "description": "Create a new version of an object (don't overwrite)",
+                    "parameters": {
+                        "object_id": {
+                            "type": "string",
+                            "description": "Object to version",
+                            "required": True
+                        },
+                        "new_content": {
+                            "type": "string",
+                            "description": "New content",
+                            "required": True
+                        },
+                        "metadata": {
                             "type": "object",
-                            "description": "Version history"
+                            "description": "Additional metadata"
+                        },
+                        "change_reason": {
+                            "type": "string",
+                            "description": "Why the change was made"
                         }
                     },
-                    "resolve_conflict": {
-                        "description": "Resolve conflicts between versions",
-                        "parameters": {
-                            "object_ids": {
-                                "type": "array",
-                                "description": "List of conflicting object IDs",
-                                "required": True
-                            },
-                            "resolution": {
-                                "type": "string",
-                                "description": "Strategy: latest_valid, highest_trust, merge, manual",
-                                "default": "latest_valid"
-                            }
-                        },
-                        "returns": {
-                            "type": "object",
-                            "description": "Resolved object or candidates"
+                    "returns": {
+                        "type": "object",
+                        "description": "Version info with old/new IDs"
+                    }
+                },
+                "get_versions": {
+                    "description": "Get version history for an object",
+                    "parameters": {
+                        "object_id": {
+                            "type": "string",
+                            "description": "Object ID",
+                            "required": True
+                        },
+                        "include_content": {
+                            "type": "boolean",
+                            "description": "Include content in response",
+                            "default": False
                         }
                     },
-                    "export_training_batch": {
-                        "description": "Export data for continual learning",
-                        "parameters": {
-                            "criteria": {
-                                "type": "object",
-                                "description": "Export criteria (batch_type, time_range, domain_tags)",
-                                "required": True
-                            }
-                        },
-                        "returns": {
-                            "type": "object",
-                            "description": "Training batch manifest"
+                    "returns": {
+                        "type": "object",
+                        "description": "Version history"
+                    }
+                },
+                "resolve_conflict": {
+                    "description": "Resolve conflicts between versions",
+                    "parameters": {
+                        "object_ids": {
+                            "type": "array",
+                            "description": "List of conflicting object IDs",
+                            "required": True
+                        },
+                        "resolution": {
+                            "type": "string",
+                            "description": "Strategy: latest_valid, highest_trust, merge, manual",
+                            "default": "latest_valid"
                         }
                     },
-                    "stats": {
-                        "description": "Get memory system statistics",
-                        "parameters": {},
-                        "returns": {
+                    "returns": {
+                        "type": "object",
+                        "description": "Resolved object or candidates"
+                    }
+                },
+                "export_training_batch": {
+                    "description": "Export data for continual learning",
+                    "parameters": {
+                        "criteria": {
                             "type": "object",
-                            "description": "Stats for all tiers"
+                            "description": "Export criteria (batch_type, time_range, domain_tags)",
+                            "required": True
                         }
                     },
-                    "maintenance": {
-                        "description": "Run maintenance tasks (promotion/demotion)",
-                        "parameters": {},
-                        "returns": {
-                            "type": "object",
-                            "description": "Maintenance results"
-                        }
+                    "returns": {
+                        "type": "object",
+                        "description": "Training batch manifest"
                     }
                 },
-                "resources": {
-                    "context_pack": {
-                        "uri": "memory://context_pack/{request_id}",
-                        "description": "Cached context pack"
-                    },
-                    "schema": {
-                        "uri": "memory://schema/{project}",
-                        "description": "Project-specific retrieval schema"
-                    },
-                    "object": {
-                        "uri": "memory://object/{object_id}",
-                        "description": "Memory object by ID"
+                "stats": {
+                    "description": "Get memory system statistics",
+                    "parameters": {},
+                    "returns": {
+                        "type": "object",
+                        "description": "Stats for all tiers"
                     }
                 },
-                "prompts": {
-                    "memory_usage_finance": "Safe memory usage for finance domain",
-                    "memory_usage_engineering": "Safe memory usage for engineering domain",
-                    "memory_usage_code": "Safe memory usage for code context"
+                "maintenance": {
+                    "description": "Run maintenance tasks (promotion/demotion)",
+                    "parameters": {},
+                    "returns": {
+                        "type": "object",
+                        "description": "Maintenance results"
+                    }
                 }
+            },
+            "resources": {
+                "context_pack": {
+                    "uri": "memory://context_pack/{request_id}",
+                    "description": "Cached context pack"
+                },
+                "schema": {
+                    "uri": "memory://schema/{project}",
+                    "description": "Project-specific retrieval schema"
+                },
+                "object": {
+                    "uri": "memory://object/{object_id}",
+                    "description": "Memory object by ID"
+                }
+            },
+            "prompts": {
+                "memory_usage_finance": "Safe memory usage for finance domain",
+                "memory_usage_engineering": "Safe memory usage for engineering domain",
+                "memory_usage_code": "Safe memory usage for code context"
             }
         }
     }
-    
-    return jsonify(manifest)
+}
+
+# Describe only the tools this deployment enables
+_MANIFEST["tools"] = {name: tool for name, tool in _MANIFEST["tools"].items() if name in TOOL_HANDLERS}
+
+# The manifest never changes at runtime, so serialize it and compute its ETag once
+_MANIFEST_BYTES = orjson.dumps(_MANIFEST)
+_MANIFEST_ETAG = hashlib.blake2b(_MANIFEST_BYTES, digest_size=8).hexdigest()
+
+# MCP manifest endpoint
+@app.route('/mcp/manifest', methods=['GET'])
+def mcp_manifest():
+    """Returns the MCP manifest describing available tools"""
+    response = Response(_MANIFEST_BYTES, mimetype='application/json')
+    response.set_etag(_MANIFEST_ETAG)
+    response.cache_control.public = True
+    response.cache_control.max_age = 3600
+    # Answers 304 Not Modified when the client's If-None-Match matches
+    return response.make_conditional(request)
 
 # Health check endpoint
 @app.route('/health', methods=['GET'])
@@ -1,11 +1,16 @@
 # tools/memory_tool.py
-from flask import Blueprint, request, jsonify, current_app
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, JSON
+from flask import Blueprint, Response, request, jsonify, stream_with_context, current_app
+from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, JSON, select, insert, update, delete, func, text, literal_column, bindparam
+from sqlalchemy.sql import table, column
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
 import datetime
+import itertools
 import json
-import uuid
+import secrets
+from typing import Optional
+import msgspec
+import orjson
+from ._http_cache import TTLCache
 
 memory_routes = Blueprint('memory', __name__)
 
@@ -19,30 +24,167 @@ class MemoryItem(Base):
     id = Column(Integer, primary_key=True)
     key = Column(String(100), unique=True, nullable=False)
     value = Column(Text, nullable=True)
-    metadata = Column(JSON, nullable=True)
+    # 'metadata' is reserved on declarative classes; the column keeps its name
+    item_metadata = Column('metadata', JSON, nullable=True)
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
-    
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'key': self.key,
-            'value': self.value,
-            'metadata': self.metadata,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat()
-        }
+
+# Core table for the hot paths; reads and writes skip ORM instance construction
+memory_items = MemoryItem.__table__
+_ITEM_FIELDS = tuple(str(name) for name in memory_items.c.keys())
+
+# Substring index for search_memory. SQLite gets an FTS5 table with the
+# trigram tokenizer (MATCH on a quoted phrase is a case-insensitive substring
+# match, like LIKE); Postgres gets a pg_trgm GIN index, which LIKE uses as-is.
+_SQLITE_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS memory_fts USING fts5(value, content='memory_items', content_rowid='id', tokenize='trigram')",
+    """CREATE TRIGGER IF NOT EXISTS memory_items_fts_insert AFTER INSERT ON memory_items BEGIN
+        INSERT INTO memory_fts(rowid, value) VALUES (new.id, new.value);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS memory_items_fts_delete AFTER DELETE ON memory_items BEGIN
+        INSERT INTO memory_fts(memory_fts, rowid, value) VALUES ('delete', old.id, old.value);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS memory_items_fts_update AFTER UPDATE ON memory_items BEGIN
+        INSERT INTO memory_fts(memory_fts, rowid, value) VALUES ('delete', old.id, old.value);
+        INSERT INTO memory_fts(rowid, value) VALUES (new.id, new.value);
+    END""",
+    "INSERT INTO memory_fts(memory_fts) VALUES ('rebuild')"
+]
+_POSTGRES_TRGM_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_memory_items_value_trgm ON memory_items USING gin (value gin_trgm_ops)"
+]
+memory_fts = table('memory_fts', column('rowid'))
+
+# Trigrams need at least three characters; shorter queries fall back to LIKE
+_FTS_MIN_QUERY = 3
+
+# Whether the SQLite FTS table is available (set by initialize_db)
+_use_fts = False
+
+# Statements for the hot point lookup and UPSERT, built once so every call
+# reuses the same compiled form from the engine's statement cache. Typed
+# columns/binds keep the JSON and DateTime conversions of the Core table.
+_GET_STMT = text(
+    "SELECT id, key, value, metadata, created_at, updated_at FROM memory_items WHERE key = :key"
+).columns(*memory_items.c)
+
+# ON CONFLICT ... DO UPDATE has the same syntax on SQLite and Postgres;
+# column onupdate defaults don't apply to it, so updated_at is bound explicitly
+_UPSERT_SQL = (
+    "INSERT INTO memory_items (key, value, metadata, created_at, updated_at) "
+    "VALUES (:key, :value, :metadata, :now, :now) "
+    "ON CONFLICT (key) DO UPDATE SET "
+    "value = excluded.value, metadata = excluded.metadata, updated_at = excluded.updated_at"
+)
+_UPSERT_BINDS = (bindparam('metadata', type_=JSON), bindparam('now', type_=DateTime))
+_UPSERT_STMT = text(_UPSERT_SQL).bindparams(*_UPSERT_BINDS)
+_UPSERT_RETURNING_STMT = text(
+    _UPSERT_SQL + " RETURNING id, key, value, metadata, created_at, updated_at"
+).bindparams(*_UPSERT_BINDS).columns(*memory_items.c)
+
+# list/search statements, built once like the ones above; the LIKE pattern,
+# limit and offset are bound per call, so every filter value shares one
+# cached compilation. Wildcards in user input are escaped with a backslash.
+# List pages carry the total match count on every row (COUNT(*) OVER ()),
+# so a page and its total come back in one query.
+_LIKE_ESCAPE = '\\'
+_KEY_LIKE = memory_items.c.key.like(bindparam('pattern'), escape=_LIKE_ESCAPE)
+_LIST_COLUMNS = (memory_items, func.count().over().label('total_count'))
+_LIST_STMT = select(*_LIST_COLUMNS).order_by(memory_items.c.id).limit(bindparam('limit')).offset(bindparam('offset'))
+_LIST_FILTERED_STMT = (
+    select(*_LIST_COLUMNS)
+    .where(_KEY_LIKE)
+    .order_by(memory_items.c.id)
+    .limit(bindparam('limit'))
+    .offset(bindparam('offset'))
+)
+_COUNT_STMT = select(func.count()).select_from(memory_items)
+_COUNT_FILTERED_STMT = _COUNT_STMT.where(_KEY_LIKE)
+_SEARCH_LIKE_STMT = select(memory_items).where(
+    memory_items.c.value.like(bindparam('pattern'), escape=_LIKE_ESCAPE)
+)
+_SEARCH_FTS_STMT = (
+    select(memory_items)
+    .join(memory_fts, memory_fts.c.rowid == memory_items.c.id)
+    .where(literal_column('memory_fts').op('MATCH')(bindparam('phrase')))
+)
+
+# Rows fetched per round trip when streaming list/search results
+_STREAM_BATCH = 1000
+
+# Upper bound on list_memory's page size
+_MAX_LIST_LIMIT = 1000
+
+class ListParams(msgspec.Struct):
+    """Parameters of the list action, converted and type-checked in one pass"""
+    filterKey: Optional[str] = None
+    limit: int = 100
+    offset: int = 0
+
+# Hot-key read cache for get_memory, refreshed by set_memory and cleared by
+# delete_memory. It is per process: other gunicorn workers keep serving their
+# cached copy of a changed or deleted item until its entry expires, so the TTL
+# (MEMORY_CACHE_TTL, set in initialize_db) bounds that staleness; 0 disables it.
+_cache_ttl = 0
+_item_cache = TTLCache(maxsize=10000)
 
 # Initialize database
 engine = None
-Session = None
 
 def initialize_db(app):
     """Initialize the database with the Flask app context"""
-    global engine, Session
-    engine = create_engine(app.config['MEMORY_DB_URI'])
+    global engine, _cache_ttl
+    _cache_ttl = app.config.get('MEMORY_CACHE_TTL', 0)
+    uri = app.config['MEMORY_DB_URI']
+    options = {'future': True, 'pool_pre_ping': True, 'query_cache_size': 1200}
+    if not uri.startswith('sqlite'):
+        # SQLite's default pools take no size: file databases get NullPool (a new
+        # connection per checkout) and :memory: a per-thread SingletonThreadPool
+        options['pool_size'] = 20
+    engine = create_engine(uri, **options)
     Base.metadata.create_all(engine)
-    Session = sessionmaker(bind=engine)
+    _create_search_index(app)
+
+def _create_search_index(app):
+    """Create the substring search index for the engine's dialect, if supported"""
+    global _use_fts
+    dialect = engine.dialect.name
+    try:
+        with engine.begin() as conn:
+            if dialect == 'sqlite':
+                exists = conn.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'memory_fts'")).first()
+                if not exists:
+                    for statement in _SQLITE_FTS_DDL:
+                        conn.execute(text(statement))
+                _use_fts = True
+            elif dialect == 'postgresql':
+                for statement in _POSTGRES_TRGM_DDL:
+                    conn.execute(text(statement))
+    except Exception as e:
+        # e.g. SQLite built without FTS5, or no privilege to create the extension
+        app.logger.warning(f"Memory search index unavailable, using LIKE scans: {e}")
+
+def _row_to_dict(row):
+    """
+    Convert a memory_items row mapping to the tool's output format.
+
+    Timestamps stay datetime objects; the orjson JSON provider writes them in
+    ISO 8601, the same text isoformat() produced, without a Python call per field.
+    Keys are plain str: a row's own key for the reserved 'metadata' column is a
+    str subclass, which orjson does not accept as a dict key. Columns after the
+    table's own (such as list_memory's total_count) are dropped.
+    """
+    return dict(zip(_ITEM_FIELDS, row.values()))
+
+def _contains_pattern(substring):
+    """LIKE pattern matching values that contain substring literally"""
+    escaped = (
+        substring.replace(_LIKE_ESCAPE, _LIKE_ESCAPE * 2)
+        .replace('%', _LIKE_ESCAPE + '%')
+        .replace('_', _LIKE_ESCAPE + '_')
+    )
+    return f'%{escaped}%'
 
 def handle_action(action, parameters):
     """Handle Memory tool actions according to MCP standard"""
@@ -66,18 +208,20 @@ def get_memory(parameters):
     if not key:
         raise ValueError("Key parameter is required")
     
-    # Initialize DB if needed
-    if engine is None:
-        initialize_db(current_app)
+    item = _item_cache.get(key)
+    if item is not None:
+        return item
     
-    session = Session()
-    item = session.query(MemoryItem).filter_by(key=key).first()
-    session.close()
+    with engine.connect() as conn:
+        row = conn.execute(_GET_STMT, {'key': key}).mappings().first()
     
-    if not item:
+    if not row:
         raise ValueError(f"Memory item with key '{key}' not found")
     
-    return item.to_dict()
+    item = _row_to_dict(row)
+    if _cache_ttl > 0:
+        _item_cache.set(key, item, _cache_ttl)
+    return item
 
 def set_memory(parameters):
     """Create or update a memory item"""
@@ -86,28 +230,32 @@ def set_memory(parameters):
     metadata = parameters.get('metadata', {})
     
     if not key:
-        key = str(uuid.uuid4())
-    
-    # Initialize DB if needed
-    if engine is None:
-        initialize_db(current_app)
+        key = secrets.token_hex(16)
     
-    session = Session()
-    item = session.query(MemoryItem).filter_by(key=key).first()
+    dialect = engine.dialect.name
+    upsert_params = {'key': key, 'value': value, 'metadata': metadata, 'now': datetime.datetime.utcnow()}
     
-    if item:
-        item.value = value
-        item.metadata = metadata
-        item.updated_at = datetime.datetime.utcnow()
-    else:
-        item = MemoryItem(key=key, value=value, metadata=metadata)
-        session.add(item)
+    with engine.begin() as conn:
+        if dialect == 'postgresql':
+            row = conn.execute(_UPSERT_RETURNING_STMT, upsert_params).mappings().first()
+        elif dialect == 'sqlite':
+            # No RETURNING for SQLite on this SQLAlchemy version; read back in the same transaction
+            conn.execute(_UPSERT_STMT, upsert_params)
+            row = conn.execute(_GET_STMT, {'key': key}).mappings().first()
+        else:
+            updated = conn.execute(
+                update(memory_items)
+                .where(memory_items.c.key == key)
+                .values(value=value, metadata=metadata)
+            )
+            if updated.rowcount == 0:
+                conn.execute(insert(memory_items).values(key=key, value=value, metadata=metadata))
+            row = conn.execute(select(memory_items).where(memory_items.c.key == key)).mappings().first()
     
-    session.commit()
-    result = item.to_dict()
-    session.close()
-    
-    return result
+    item = _row_to_dict(row)
+    if _cache_ttl > 0:
+        _item_cache.set(key, item, _cache_ttl)
+    return item
 
 def delete_memory(parameters):
     """Delete a memory item by key"""
@@ -116,43 +264,49 @@ def delete_memory(parameters):
     if not key:
         raise ValueError("Key parameter is required")
     
-    # Initialize DB if needed
-    if engine is None:
-        initialize_db(current_app)
-    
-    session = Session()
-    item = session.query(MemoryItem).filter_by(key=key).first()
+    with engine.begin() as conn:
+        deleted = conn.execute(delete(memory_items).where(memory_items.c.key == key))
+    _item_cache.pop(key)
     
-    if not item:
-        session.close()
+    if deleted.rowcount == 0:
         raise ValueError(f"Memory item with key '{key}' not found")
     
-    session.delete(item)
-    session.commit()
-    session.close()
-    
     return {'success': True, 'message': f'Memory item with key {key} deleted successfully'}
 
 def list_memory(parameters):
     """List all memory items, with optional filtering"""
-    filter_key = parameters.get('filterKey')
-    limit = int(parameters.get('limit', 100))
-    offset = int(parameters.get('offset', 0))
-    
-    # Initialize DB if needed
-    if engine is None:
-        initialize_db(current_app)
+    try:
+        # Not strict, so query-string values such as '100' are accepted
+        list_params = msgspec.convert(parameters, ListParams, strict=False)
+    except msgspec.ValidationError as e:
+        raise ValueError(f"Invalid list parameters: {e}")
     
-    session = Session()
-    query = session.query(MemoryItem)
+    filter_key = list_params.filterKey
+    limit = min(max(list_params.limit, 1), _MAX_LIST_LIMIT)
+    offset = max(list_params.offset, 0)
     
+    params = {'limit': limit, 'offset': offset}
     if filter_key:
-        query = query.filter(MemoryItem.key.like(f'%{filter_key}%'))
+        query, count_query = _LIST_FILTERED_STMT, _COUNT_FILTERED_STMT
+        params['pattern'] = _contains_pattern(filter_key)
+    else:
+        query, count_query = _LIST_STMT, _COUNT_STMT
     
-    total = query.count()
-    items = query.limit(limit).offset(offset).all()
-    result = [item.to_dict() for item in items]
-    session.close()
+    total = 0
+    result = []
+    with engine.connect() as conn:
+        rows = (
+            conn.execution_options(stream_results=True)
+            .execute(query, params)
+            .yield_per(_STREAM_BATCH)
+            .mappings()
+        )
+        for row in rows:
+            total = row['total_count']
+            result.append(_row_to_dict(row))
+        if not result and offset:
+            # A page past the end has no rows to carry the total
+            total = conn.execute(count_query, params).scalar()
     
     return {
         'items': result,
@@ -161,21 +315,28 @@ def list_memory(parameters):
         'offset': offset
     }
 
-def search_memory(parameters):
-    """Search memory items by value"""
-    query_string = parameters.get('q')
-    
+def _search_query(query_string):
+    """Statement and bind parameters selecting memory items whose value contains query_string"""
     if not query_string:
         raise ValueError("Query parameter is required")
     
-    # Initialize DB if needed
-    if engine is None:
-        initialize_db(current_app)
+    if _use_fts and len(query_string) >= _FTS_MIN_QUERY:
+        return _SEARCH_FTS_STMT, {'phrase': '"' + query_string.replace('"', '""') + '"'}
+    return _SEARCH_LIKE_STMT, {'pattern': _contains_pattern(query_string)}
+
+def search_memory(parameters):
+    """Search memory items by value"""
+    query_string = parameters.get('q')
+    query, params = _search_query(query_string)
     
-    session = Session()
-    items = session.query(MemoryItem).filter(MemoryItem.value.like(f'%{query_string}%')).all()
-    result = [item.to_dict() for item in items]
-    session.close()
+    with engine.connect() as conn:
+        rows = (
+            conn.execution_options(stream_results=True)
+            .execute(query, params)
+            .yield_per(_STREAM_BATCH)
+            .mappings()
+        )
+        result = [_row_to_dict(row) for row in rows]
     
     return {
         'items': result,
@@ -183,6 +344,37 @@ def search_memory(parameters):
         'query': query_string
     }
 
+def _search_batches(query, params):
+    """Yield (JSON-encoded rows, row count) for each batch of search results as it is fetched"""
+    with engine.connect() as conn:
+        rows = (
+            conn.execution_options(stream_results=True)
+            .execute(query, params)
+            .yield_per(_STREAM_BATCH)
+            .mappings()
+        )
+        for batch in rows.partitions():
+            yield b','.join(orjson.dumps(_row_to_dict(row)) for row in batch), len(batch)
+
+def _stream_search(batches, query_string):
+    """
+    Yield the search_memory response as JSON from the encoded batches.
+    
+    A failure partway through is logged and re-raised: the 200 status is
+    already sent, so the server must drop the connection rather than close
+    the array and make a partial result look complete.
+    """
+    count = 0
+    yield b'{"items":['
+    try:
+        for chunk, size in batches:
+            yield (b',' + chunk) if count else chunk
+            count += size
+    except Exception as e:
+        current_app.logger.error(f"Memory search failed mid-stream: {e}")
+        raise
+    yield b'],"count":' + orjson.dumps(count) + b',"query":' + orjson.dumps(query_string) + b'}\n'
+
 # API routes for direct access (not through MCP gateway)
 @memory_routes.route('/get', methods=['GET'])
 def api_get_memory():
@@ -198,7 +390,7 @@ def api_get_memory():
 def api_set_memory():
     """API endpoint for setting a memory item"""
     try:
-        data = request.get_json()
+        data = orjson.loads(request.get_data(cache=False))
         parameters = {
             'key': data.get('key'),
             'value': data.get('value'),
@@ -229,7 +421,7 @@ def api_list_memory():
             'offset': request.args.get('offset', 0)
         }
         result = list_memory(parameters)
-        return jsonify(result)
+        return Response(orjson.dumps(result, option=orjson.OPT_APPEND_NEWLINE), mimetype='application/json')
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
@@ -237,13 +429,25 @@ def api_list_memory():
 def api_search_memory():
     """API endpoint for searching memory items"""
     try:
-        query = request.args.get('q')
-        result = search_memory({'q': query})
-        return jsonify(result)
+        query_string = request.args.get('q')
+        query, params = _search_query(query_string)
     except Exception as e:
         return jsonify({'error': str(e)}), 400
+    
+    # Rows are streamed, so the first bytes go out before the full result is
+    # read. The first batch is fetched before the response is committed, so a
+    # failing query still gets a proper error status.
+    batches = _search_batches(query, params)
+    try:
+        first = next(batches, None)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    if first is not None:
+        batches = itertools.chain([first], batches)
+    return Response(stream_with_context(_stream_search(batches, query_string)), mimetype='application/json')
 
-# Initialize the database on first request
-@memory_routes.before_app_first_request
-def before_first_request():
-    initialize_db(current_app)
+# Initialize the database when the blueprint is registered, so handlers
+# never need to check for it
+@memory_routes.record_once
+def on_register(state):
+    initialize_db(state.app)
@@ -0,0 +1,159 @@
+// node_scripts/common.js
+//
+// Browser launch and page plumbing shared by the render operations
+// (screenshot.js, pdf.js, extract.js) and the worker that runs them.
+
+const puppeteer = require('puppeteer');
+
+// Chromium switches for headless rendering: turn off the background
+// services, GPU paths and extras a screenshot/PDF/extract never uses, to
+// cut CPU and memory per render. Built once for the life of the worker.
+const CHROMIUM_ARGS = [
+  '--no-sandbox',
+  '--disable-setuid-sandbox',
+  '--no-zygote',
+  '--no-first-run',
+  '--no-default-browser-check',
+  '--no-pings',
+  '--autoplay-policy=user-gesture-required',
+  '--disable-accelerated-2d-canvas',
+  '--disable-background-networking',
+  '--disable-background-timer-throttling',
+  '--disable-backgrounding-occluded-windows',
+  '--disable-breakpad',
+  '--disable-client-side-phishing-detection',
+  '--disable-component-update',
+  '--disable-default-apps',
+  '--disable-dev-shm-usage',
+  '--disable-domain-reliability',
+  '--disable-extensions',
+  '--disable-features=AudioServiceOutOfProcess,Translate',
+  '--disable-gpu',
+  '--disable-hang-monitor',
+  '--disable-ipc-flooding-protection',
+  '--disable-notifications',
+  '--disable-popup-blocking',
+  '--disable-prompt-on-repost',
+  '--disable-renderer-backgrounding',
+  '--disable-speech-api',
+  '--disable-sync',
+  '--hide-scrollbars',
+  '--metrics-recording-only',
+  '--mute-audio',
+  '--password-store=basic',
+  '--use-mock-keychain',
+  // Cap each renderer's V8 heap
+  '--js-flags=--max-old-space-size=256'
+];
+
+// One process for browser and renderers saves memory in small containers,
+// but a crashing page then takes the whole browser down, so it is opt-in
+if (process.env.PUPPETEER_SINGLE_PROCESS === '1') {
+  CHROMIUM_ARGS.push('--single-process');
+}
+
+// Persistent profile directory (set by the Python side when
+// PUPPETEER_USER_DATA_DIR is configured). Its disk cache keeps CSS, JS,
+// fonts and images across renders and restarts.
+const USER_DATA_DIR = process.env.PUPPETEER_USER_DATA_DIR || undefined;
+
+const launchOptions = {
+  headless: process.env.PUPPETEER_HEADLESS !== '0',
+  executablePath: process.env.CHROME_PATH || undefined,
+  userDataDir: USER_DATA_DIR,
+  args: CHROMIUM_ARGS
+};
+
+function launchBrowser(opts = {}) {
+  return puppeteer.launch({ ...launchOptions, ...opts });
+}
+
+// Close a browser, killing Chromium outright if it does not exit in time so
+// no orphaned processes are left behind
+async function closeBrowser(instance) {
+  const child = instance.process();
+  try {
+    await Promise.race([
+      instance.close(),
+      new Promise((resolve, reject) => setTimeout(() => reject(new Error('close timed out')), 5000))
+    ]);
+  } catch (err) {
+    if (child) {
+      child.kill('SIGKILL');
+    }
+  }
+}
+
+// An incognito context isolates cookies, storage and cache from other
+// requests at a fraction of the cost of launching another browser. With a
+// persistent profile, pages open in the default context instead, since
+// only that context uses the profile's disk cache.
+async function openPage(browser) {
+  if (USER_DATA_DIR) {
+    return { context: null, page: await browser.newPage() };
+  }
+  const context = await browser.createIncognitoBrowserContext();
+  return { context, page: await context.newPage() };
+}
+
+// Navigate page to args.url and wait until it is ready to render; returns
+// how long each wait took
+async function preparePage(page, args) {
+  if (args.viewport) {
+    await page.setViewport(args.viewport);
+  }
+
+  if (args.userAgent) {
+    await page.setUserAgent(args.userAgent);
+  }
+
+  // Abort requests for resource types the result doesn't need. Request
+  // interception also turns off the page's HTTP cache, so with a persistent
+  // profile nothing is blocked: there, repeat subresources come from the
+  // profile's disk cache, which is what the profile is for.
+  const blocked = new Set(USER_DATA_DIR ? [] : (args.blockResources || []));
+  if (blocked.size) {
+    await page.setRequestInterception(true);
+    page.on('request', request => {
+      if (blocked.has(request.resourceType())) {
+        request.abort();
+      } else {
+        request.continue();
+      }
+    });
+  }
+
+  // 'networkidle2' never settles on pages with beacons or long polling, so
+  // the default is an earlier lifecycle event, with waitForSelector as the
+  // readiness gate when the caller knows what to wait for
+  const timings = {};
+  let started = Date.now();
+  await page.goto(args.url, {
+    waitUntil: args.waitUntil || 'load',
+    timeout: args.timeout || 30000
+  });
+  timings.gotoMs = Date.now() - started;
+
+  if (args.waitForSelector) {
+    started = Date.now();
+    await page.waitForSelector(args.waitForSelector, { timeout: args.selectorTimeout || 30000 });
+    timings.selectorMs = Date.now() - started;
+  }
+
+  if (args.waitTime) {
+    await new Promise(resolve => setTimeout(resolve, args.waitTime));
+  }
+
+  return timings;
+}
+
+// Close whatever openPage() opened; never throws
+async function cleanup(page, context) {
+  if (context) {
+    await context.close().catch(() => {});
+  } else if (page) {
+    await page.close().catch(() => {});
+  }
+}
+
+module.exports = { launchBrowser, closeBrowser, openPage, preparePage, cleanup };
@@ -0,0 +1,67 @@
+// node_scripts/extract.js
+//
+// Content extraction operation for worker.js: the page's text or HTML,
+// or that of the elements matching args.selector. Strings are cut to
+// args.maxLength inside the page, so oversized content never crosses the
+// DevTools connection.
+
+const DEFAULT_MAX_LENGTH = 1024 * 1024;
+
+// The in-page functions, defined once for the life of the worker. Each
+// always sends Chromium the same source with the request's values passed
+// as arguments, so V8 can reuse its compiled code instead of parsing a new
+// script per request.
+const EXTRACTORS = {
+  // Only the named attributes of each element ("text" and "html" stand for
+  // its trimmed text and its markup), instead of its whole outerHTML
+  fieldsBySelector: (selector, fields, maxLength) => {
+    const value = (el, field) => {
+      if (field === 'text') {
+        return el.textContent.trim();
+      }
+      if (field === 'html') {
+        return el.outerHTML;
+      }
+      return el.getAttribute(field);
+    };
+    return Array.from(document.querySelectorAll(selector)).map(el => {
+      const record = {};
+      for (const field of fields) {
+        const v = value(el, field);
+        record[field] = v === null ? null : v.slice(0, maxLength);
+      }
+      return record;
+    });
+  },
+  htmlBySelector: (selector, maxLength) =>
+    Array.from(document.querySelectorAll(selector)).map(el => el.outerHTML.slice(0, maxLength)),
+  textBySelector: (selector, maxLength) =>
+    Array.from(document.querySelectorAll(selector)).map(el => el.textContent.trim().slice(0, maxLength)),
+  // Serialized in the page rather than with page.content(), so it can be
+  // cut before it is sent
+  fullHtml: (maxLength) => {
+    const doctype = document.doctype ? new XMLSerializer().serializeToString(document.doctype) : '';
+    return (doctype + document.documentElement.outerHTML).slice(0, maxLength);
+  },
+  fullText: (maxLength) => document.body.innerText.slice(0, maxLength)
+};
+
+async function extract(page, args) {
+  const maxLength = args.maxLength || DEFAULT_MAX_LENGTH;
+  let content;
+
+  if (args.selector && args.fields) {
+    content = await page.evaluate(EXTRACTORS.fieldsBySelector, args.selector, args.fields, maxLength);
+  } else if (args.selector) {
+    const extractor = args.extractHtml ? EXTRACTORS.htmlBySelector : EXTRACTORS.textBySelector;
+    content = await page.evaluate(extractor, args.selector, maxLength);
+  } else if (args.extractHtml) {
+    content = await page.evaluate(EXTRACTORS.fullHtml, maxLength);
+  } else {
+    content = await page.evaluate(EXTRACTORS.fullText, maxLength);
+  }
+
+  return { content };
+}
+
+module.exports = { extract };
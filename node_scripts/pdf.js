@@ -0,0 +1,28 @@
+// node_scripts/pdf.js
+//
+// PDF operations for worker.js: pdf returns the whole document as the raw
+// binary part of the response frame, pdfStream sends it in chunks as
+// Chromium produces it.
+
+function pdfOptions(args) {
+  return {
+    format: args.format || 'A4',
+    printBackground: args.printBackground !== false,
+    margin: args.margin || { top: '1cm', right: '1cm', bottom: '1cm', left: '1cm' }
+  };
+}
+
+async function pdf(page, args) {
+  const data = await page.pdf(pdfOptions(args));
+  return { data };
+}
+
+async function pdfStream(page, args, sendChunk) {
+  const stream = await page.createPDFStream(pdfOptions(args));
+  for await (const chunk of stream) {
+    sendChunk(chunk);
+  }
+  return {};
+}
+
+module.exports = { pdf, pdfStream };
@@ -0,0 +1,15 @@
+// node_scripts/screenshot.js
+//
+// Screenshot operation for worker.js. The image comes back as the raw
+// binary part of the response frame; nothing is written to disk.
+
+async function screenshot(page, args) {
+  const data = await page.screenshot({
+    fullPage: args.fullPage === true,
+    type: args.type || 'png',
+    quality: args.type === 'jpeg' ? (args.quality || 80) : undefined
+  });
+  return { data };
+}
+
+module.exports = { screenshot };
@@ -0,0 +1,211 @@
+// node_scripts/worker.js
+//
+// Long-lived Puppeteer worker for tools/puppeteer_tool.py. It launches one
+// Chromium browser, renders each command in a fresh incognito context, and
+// serves commands read from stdin. Every message, in either direction, is a
+// frame: two 4-byte big-endian lengths, then that many bytes of UTF-8 JSON
+// followed by that many bytes of raw binary data (a screenshot or PDF; empty
+// for everything else):
+//
+//   request:  {"id": 1, "op": "screenshot" | "pdf" | "pdfStream" | "extract", "args": {...}}
+//   response: {"id": 1, "ok": true, "result": {...}}   (+ binary data)
+//             {"id": 1, "chunk": true}                   (+ binary data; streamed
+//                                                         ops, before the result)
+//             {"id": 1, "ok": false, "error": "message"}
+//   event:    {"event": "draining" | "ready"}   (browser recycle, no id)
+//
+// Commands are handled concurrently and answered as they finish, so
+// responses may arrive out of order. stdout carries only protocol
+// messages; diagnostics go to stderr.
+//
+// Browser launch and page setup live in common.js; each operation is in
+// its own module (screenshot.js, pdf.js, extract.js).
+
+const { launchBrowser, closeBrowser, openPage, preparePage, cleanup } = require('./common');
+const { screenshot } = require('./screenshot');
+const { pdf, pdfStream } = require('./pdf');
+const { extract } = require('./extract');
+
+// Renders this worker runs at once, each in its own browser context.
+// Chromium handles only a few busy tabs well, and every gunicorn process
+// runs its own workers, so keep this small.
+const MAX_CONTEXTS = parseInt(process.env.MAX_CONCURRENT_RENDERS, 10) || 2;
+
+// Long-lived Chromium leaks memory, so the browser is replaced after this
+// many renders or this much time, whichever comes first
+const MAX_PAGES_PER_BROWSER = parseInt(process.env.MAX_PAGES_PER_BROWSER, 10) || 500;
+const MAX_BROWSER_AGE_MS = parseInt(process.env.MAX_BROWSER_AGE_MS, 10) || 15 * 60 * 1000;
+
+let browser = null;
+let launching = null;
+let launchedAt = 0;
+let pagesProcessed = 0;
+
+function getBrowser() {
+  if (browser) {
+    return Promise.resolve(browser);
+  }
+  if (!launching) {
+    launching = launch().finally(() => { launching = null; });
+  }
+  return launching;
+}
+
+async function launch() {
+  const instance = await launchBrowser();
+  instance.on('disconnected', () => {
+    // Chromium crashed or was killed: relaunch on the next request
+    if (browser === instance) {
+      console.error('Browser disconnected; relaunching on next request');
+      browser = null;
+    }
+  });
+  browser = instance;
+  launchedAt = Date.now();
+  pagesProcessed = 0;
+  return instance;
+}
+
+// Renders in progress, and the recycle (if any) waiting for them to finish
+let inFlight = 0;
+let onIdle = null;
+let recycling = null;
+
+function needsRecycle() {
+  return browser !== null && !recycling &&
+    (pagesProcessed >= MAX_PAGES_PER_BROWSER || Date.now() - launchedAt >= MAX_BROWSER_AGE_MS);
+}
+
+function maybeRecycle() {
+  if (needsRecycle()) {
+    recycling = recycle(browser).finally(() => { recycling = null; });
+  }
+}
+
+async function recycle(instance) {
+  // Tell the Python side to route new calls to sibling workers; any that
+  // still arrive wait for the new browser instead of failing
+  reply({ event: 'draining' });
+  if (inFlight > 0) {
+    await new Promise(resolve => { onIdle = resolve; });
+  }
+  browser = null;
+  await closeBrowser(instance);
+  try {
+    await getBrowser();
+  } catch (err) {
+    console.error(`Browser relaunch failed: ${err.message}`);
+  }
+  reply({ event: 'ready' });
+}
+
+// The age limit also applies to an idle worker
+setInterval(() => {
+  if (inFlight === 0) {
+    maybeRecycle();
+  }
+}, 30000).unref();
+
+// Counting semaphore capping the number of open browser contexts
+const slotWaiters = [];
+let freeSlots = MAX_CONTEXTS;
+
+async function acquireSlot() {
+  if (freeSlots > 0) {
+    freeSlots--;
+    return;
+  }
+  await new Promise(resolve => slotWaiters.push(resolve));
+}
+
+function releaseSlot() {
+  const next = slotWaiters.shift();
+  if (next) {
+    next();
+  } else {
+    freeSlots++;
+  }
+}
+
+// Each operation renders an already prepared page; a binary result is
+// returned as `data` and sent as the frame's binary part
+const OPS = { screenshot, pdf, pdfStream, extract };
+
+async function handle(message, sendChunk) {
+  const op = OPS[message.op];
+  if (!op) {
+    throw new Error(`Unknown operation: ${message.op}`);
+  }
+
+  while (recycling) {
+    await recycling;
+  }
+  inFlight++;
+
+  let context = null;
+  let page = null;
+  try {
+    await acquireSlot();
+    ({ context, page } = await openPage(await getBrowser()));
+    const timings = await preparePage(page, message.args);
+    return { ...(await op(page, message.args, sendChunk)), timings };
+  } finally {
+    await cleanup(page, context);
+    releaseSlot();
+    pagesProcessed++;
+    inFlight--;
+    if (inFlight === 0 && onIdle) {
+      onIdle();
+      onIdle = null;
+    }
+    maybeRecycle();
+  }
+}
+
+function reply(message, data = EMPTY) {
+  const body = Buffer.from(JSON.stringify(message), 'utf8');
+  const header = Buffer.alloc(8);
+  header.writeUInt32BE(body.length, 0);
+  header.writeUInt32BE(data.length, 4);
+  process.stdout.write(Buffer.concat([header, body, data]));
+}
+
+function dispatch(body) {
+  let message;
+  try {
+    message = JSON.parse(body.toString('utf8'));
+  } catch (err) {
+    console.error(`Ignoring malformed command: ${err.message}`);
+    return;
+  }
+  const sendChunk = chunk => reply({ id: message.id, chunk: true }, chunk);
+  handle(message, sendChunk).then(
+    ({ data, ...result }) => reply({ id: message.id, ok: true, result }, data),
+    err => reply({ id: message.id, ok: false, error: err.message })
+  );
+}
+
+// Accumulate stdin until a whole frame is available, then dispatch it
+// (commands carry no binary data)
+const EMPTY = Buffer.alloc(0);
+let pending = EMPTY;
+process.stdin.on('data', (chunk) => {
+  pending = pending.length ? Buffer.concat([pending, chunk]) : chunk;
+  while (pending.length >= 8) {
+    const length = pending.readUInt32BE(0) + pending.readUInt32BE(4);
+    if (pending.length < 8 + length) {
+      break;
+    }
+    dispatch(pending.subarray(8, 8 + pending.readUInt32BE(0)));
+    pending = pending.subarray(8 + length);
+  }
+}).on('end', async () => {
+  // The Python side closed our stdin: shut the browser down and exit
+  if (browser) {
+    await closeBrowser(browser);
+  }
+  process.exit(0);
+});
+
+// Launch the browser before the first command arrives
+getBrowser().catch(err => console.error(`Browser launch failed: ${err.message}`));
@@ -1,205 +1,380 @@
 # tools/puppeteer_tool.py
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
 import os
-import json
-import base64
+import fcntl
+import shutil
 import tempfile
+import time
+import itertools
+import queue
+import struct
 import subprocess
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
 from pathlib import Path
-import asyncio
 import threading
 
+import orjson
+
+try:
+    # SIMD-accelerated encoder with the same API as the stdlib module
+    import pybase64 as base64
+except ImportError:
+    import base64
+
 puppeteer_routes = Blueprint('puppeteer', __name__)
 
 # Path to the Node.js scripts
 SCRIPT_DIR = Path(__file__).parent.parent / 'node_scripts'
+WORKER_SCRIPT = SCRIPT_DIR / 'worker.js'
 
-def ensure_script_dir():
-    """Ensure the puppeteer scripts directory exists and create necessary scripts"""
-    os.makedirs(SCRIPT_DIR, exist_ok=True)
-    
-    # Create the screenshot script if it doesn't exist
-    screenshot_script = SCRIPT_DIR / 'screenshot.js'
-    if not screenshot_script.exists():
-        with open(screenshot_script, 'w') as f:
-            f.write("""
-const puppeteer = require('puppeteer');
-const fs = require('fs');
-
-(async () => {
-  const args = JSON.parse(process.argv[2]);
-  const browser = await puppeteer.launch({
-    headless: args.headless !== false,
-    executablePath: args.executablePath || null,
-    args: ['--no-sandbox', '--disable-setuid-sandbox']
-  });
-  
-  const page = await browser.newPage();
-  
-  if (args.viewport) {
-    await page.setViewport(args.viewport);
-  }
-  
-  if (args.userAgent) {
-    await page.setUserAgent(args.userAgent);
-  }
-  
-  await page.goto(args.url, { 
-    waitUntil: args.waitUntil || 'networkidle2',
-    timeout: args.timeout || 30000
-  });
-  
-  if (args.waitForSelector) {
-    await page.waitForSelector(args.waitForSelector, { timeout: args.selectorTimeout || 30000 });
-  }
-  
-  if (args.waitTime) {
-    await new Promise(resolve => setTimeout(resolve, args.waitTime));
-  }
-  
-  const screenshotOptions = {
-    path: args.outputPath,
-    fullPage: args.fullPage === true,
-    type: args.type || 'png',
-    quality: args.type === 'jpeg' ? (args.quality || 80) : undefined
-  };
-  
-  await page.screenshot(screenshotOptions);
-  await browser.close();
-  
-  console.log(JSON.stringify({ success: true, outputPath: args.outputPath }));
-})().catch(err => {
-  console.error(JSON.stringify({ success: false, error: err.message }));
-  process.exit(1);
-});
-            """)
-    
-    # Create the PDF script if it doesn't exist
-    pdf_script = SCRIPT_DIR / 'pdf.js'
-    if not pdf_script.exists():
-        with open(pdf_script, 'w') as f:
-            f.write("""
-const puppeteer = require('puppeteer');
-const fs = require('fs');
-
-(async () => {
-  const args = JSON.parse(process.argv[2]);
-  const browser = await puppeteer.launch({
-    headless: args.headless !== false,
-    executablePath: args.executablePath || null,
-    args: ['--no-sandbox', '--disable-setuid-sandbox']
-  });
-  
-  const page = await browser.newPage();
-  
-  if (args.viewport) {
-    await page.setViewport(args.viewport);
-  }
-  
-  if (args.userAgent) {
-    await page.setUserAgent(args.userAgent);
-  }
-  
-  await page.goto(args.url, { 
-    waitUntil: args.waitUntil || 'networkidle2',
-    timeout: args.timeout || 30000
-  });
-  
-  if (args.waitForSelector) {
-    await page.waitForSelector(args.waitForSelector, { timeout: args.selectorTimeout || 30000 });
-  }
-  
-  if (args.waitTime) {
-    await new Promise(resolve => setTimeout(resolve, args.waitTime));
-  }
-  
-  const pdfOptions = {
-    path: args.outputPath,
-    format: args.format || 'A4',
-    printBackground: args.printBackground !== false,
-    margin: args.margin || { top: '1cm', right: '1cm', bottom: '1cm', left: '1cm' }
-  };
-  
-  await page.pdf(pdfOptions);
-  await browser.close();
-  
-  console.log(JSON.stringify({ success: true, outputPath: args.outputPath }));
-})().catch(err => {
-  console.error(JSON.stringify({ success: false, error: err.message }));
-  process.exit(1);
-});
-            """)
-    
-    # Create the content extraction script if it doesn't exist
-    extract_script = SCRIPT_DIR / 'extract.js'
-    if not extract_script.exists():
-        with open(extract_script, 'w') as f:
-            f.write("""
-const puppeteer = require('puppeteer');
-const fs = require('fs');
-
-(async () => {
-  const args = JSON.parse(process.argv[2]);
-  const browser = await puppeteer.launch({
-    headless: args.headless !== false,
-    executablePath: args.executablePath || null,
-    args: ['--no-sandbox', '--disable-setuid-sandbox']
-  });
-  
-  const page = await browser.newPage();
-  
-  if (args.userAgent) {
-    await page.setUserAgent(args.userAgent);
-  }
-  
-  await page.goto(args.url, { 
-    waitUntil: args.waitUntil || 'networkidle2',
-    timeout: args.timeout || 30000
-  });
-  
-  if (args.waitForSelector) {
-    await page.waitForSelector(args.waitForSelector, { timeout: args.selectorTimeout || 30000 });
-  }
-  
-  if (args.waitTime) {
-    await new Promise(resolve => setTimeout(resolve, args.waitTime));
-  }
-  
-  let result;
-  
-  if (args.selector) {
-    if (args.extractHtml) {
-      result = await page.evaluate((selector) => {
-        const elements = Array.from(document.querySelectorAll(selector));
-        return elements.map(el => el.outerHTML);
-      }, args.selector);
-    } else {
-      result = await page.evaluate((selector) => {
-        const elements = Array.from(document.querySelectorAll(selector));
-        return elements.map(el => el.textContent.trim());
-      }, args.selector);
-    }
-  } else {
-    if (args.extractHtml) {
-      result = await page.content();
-    } else {
-      result = await page.evaluate(() => document.body.innerText);
-    }
-  }
-  
-  await browser.close();
-  
-  console.log(JSON.stringify({ success: true, content: result }));
-})().catch(err => {
-  console.error(JSON.stringify({ success: false, error: err.message }));
-  process.exit(1);
-});
-            """)
+# Resource types aborted before they load, unless the caller passes
+# blockResources. Extracted text and markup don't depend on images or fonts;
+# screenshots and PDFs only skip audio/video, so they render faithfully.
+_BLOCKED_RESOURCES = {
+    'screenshot': ['media'],
+    'pdf': ['media'],
+    'extract': ['image', 'media', 'font']
+}
+
+# Page lifecycle event page.goto waits for, unless the caller passes waitUntil.
+# Text is there at DOMContentLoaded; screenshots and PDFs wait for 'load' so
+# images are drawn. Callers with a waitForSelector get that as the real gate.
+_WAIT_UNTIL = {
+    'screenshot': 'load',
+    'pdf': 'load',
+    'extract': 'domcontentloaded'
+}
+
+# Frame header of the worker protocol: JSON length and binary data length,
+# each 4-byte big-endian
+_FRAME_HEADER = struct.Struct('>II')
+
+# Upper bound on one worker call; navigation and selector waits time out in Node first
+_CALL_TIMEOUT = 120
+
+class WorkerError(Exception):
+    """A Puppeteer worker call failed or the worker exited"""
+
+# Free space required to use the RAM-backed scratch directory; Docker's
+# default 64 MB /dev/shm falls short, so such hosts keep the disk temp dir
+_TMPFS_MIN_FREE = 512 * 1024 * 1024
+
+def _scratch_dir(config):
+    """Temp directory for the workers: a subdirectory of MCP_TMPFS_DIR if it has room, else the default temp dir"""
+    tmpfs = config.get('MCP_TMPFS_DIR')
+    if tmpfs:
+        # A subdirectory of its own, apart from the shared memory Chromium keeps in /dev/shm
+        path = os.path.join(tmpfs, 'mcp-puppeteer')
+        try:
+            os.makedirs(path, exist_ok=True)
+            if shutil.disk_usage(path).free >= _TMPFS_MIN_FREE:
+                return path
+        except OSError:
+            pass
+    return tempfile.gettempdir()
+
+# Lock files of the profile slots claimed by this process, held open until exit
+_profile_locks = []
+
+def _claim_profile_dir(base):
+    """
+    Claim a profile directory under base for one worker.
+    
+    Chromium cannot share a profile between browsers, and several server
+    processes may use the same base, so each worker takes the first slot
+    whose lock file it can lock. Slots are reused across restarts, keeping
+    their disk cache warm.
+    """
+    os.makedirs(base, exist_ok=True)
+    for slot in itertools.count():
+        lock_file = open(os.path.join(base, f'slot-{slot}.lock'), 'w')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            continue
+        _profile_locks.append(lock_file)
+        return os.path.join(base, f'slot-{slot}')
+
+def _evict_stale_profiles(base, max_age_days):
+    """Delete unclaimed profile slots under base that have not been used for max_age_days"""
+    if not os.path.isdir(base):
+        return
+    cutoff = time.time() - max_age_days * 86400
+    for name in os.listdir(base):
+        profile = os.path.join(base, name)
+        if not name.startswith('slot-') or not os.path.isdir(profile) or os.path.getmtime(profile) > cutoff:
+            continue
+        with open(profile + '.lock', 'w') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                continue  # in use by a live worker
+            shutil.rmtree(profile, ignore_errors=True)
+            os.remove(profile + '.lock')
+
+def _resolve(waiter, outcome):
+    """Deliver a call's result or WorkerError to its Future or stream queue"""
+    if isinstance(waiter, Future):
+        if isinstance(outcome, Exception):
+            waiter.set_exception(outcome)
+        else:
+            waiter.set_result(outcome)
+    else:
+        waiter.put(outcome)
+
+class WorkerClient:
+    """
+    Client for one long-lived Node worker (node_scripts/worker.js).
+    
+    The worker holds one Chromium browser, so a call pays for a page load
+    instead of a Node and Chromium cold start. Calls and responses are
+    length-prefixed JSON frames on the worker's stdin/stdout (see
+    worker.js), matched by id, so any number of threads can have calls in
+    flight. A worker that exits is started again on the next call.
+    """
+    
+    def __init__(self, config):
+        self._env = {
+            **os.environ,
+            'PUPPETEER_HEADLESS': '1' if config.get('PUPPETEER_HEADLESS', True) else '0',
+            'CHROME_PATH': config.get('CHROME_PATH') or '',
+            'PUPPETEER_SINGLE_PROCESS': '1' if config.get('PUPPETEER_SINGLE_PROCESS') else '0',
+            'MAX_CONCURRENT_RENDERS': str(config.get('MAX_CONCURRENT_RENDERS', '')),
+            # Puppeteer's throwaway profile (and its disk cache) and Chromium's
+            # temp files are created under TMPDIR
+            'TMPDIR': _scratch_dir(config),
+            'MAX_PAGES_PER_BROWSER': str(config.get('PUPPETEER_MAX_PAGES_PER_BROWSER', '')),
+            'MAX_BROWSER_AGE_MS': str(int(config.get('PUPPETEER_MAX_BROWSER_AGE', 0) * 1000) or '')
+        }
+        if config.get('PUPPETEER_USER_DATA_DIR'):
+            self._env['PUPPETEER_USER_DATA_DIR'] = _claim_profile_dir(config['PUPPETEER_USER_DATA_DIR'])
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._process = None
+        self._pending = {}
+        # Set while the worker replaces its browser (see recycle() in worker.js)
+        self.draining = False
+    
+    @property
+    def in_flight(self):
+        """Number of calls waiting for a response"""
+        return len(self._pending)
+    
+    def _ensure_started(self):
+        """Start the worker if it is not running; must be called with the lock held"""
+        # The reader thread clears _process when the worker exits, so this
+        # costs no syscall per call
+        if self._process is None:
+            self._process = subprocess.Popen(
+                ['node', str(WORKER_SCRIPT)],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                env=self._env
+            )
+            # Each process gets its own pending map, so a dead worker only fails its own calls
+            self._pending = {}
+            self.draining = False
+            threading.Thread(
+                target=self._read_responses,
+                args=(self._process, self._pending),
+                name='puppeteer-worker-reader',
+                daemon=True
+            ).start()
+    
+    def start(self):
+        """Start the worker ahead of the first call"""
+        with self._lock:
+            self._ensure_started()
+    
+    def _send(self, op, args, waiter):
+        """
+        Send op to the worker, registering waiter for its response.
+        
+        waiter is a Future for a plain call, or a SimpleQueue for a streamed
+        one. Returns the request id and the pending map it was registered in.
+        """
+        with self._lock:
+            self._ensure_started()
+            request_id = next(self._ids)
+            pending = self._pending
+            pending[request_id] = waiter
+            body = orjson.dumps({'id': request_id, 'op': op, 'args': args})
+            try:
+                self._process.stdin.write(_FRAME_HEADER.pack(len(body), 0) + body)
+                self._process.stdin.flush()
+            except OSError as e:
+                pending.pop(request_id, None)
+                raise WorkerError(f"Puppeteer worker is not accepting calls: {e}")
+        return request_id, pending
+    
+    def _forget(self, request_id, pending):
+        """Stop waiting for a response"""
+        with self._lock:
+            pending.pop(request_id, None)
+    
+    def submit(self, op, args):
+        """Send op to the worker without waiting; the returned Future resolves to its result or WorkerError"""
+        future = Future()
+        self._send(op, args, future)
+        return future
+    
+    def call(self, op, args):
+        """Run op in the worker and return its result, raising WorkerError on failure"""
+        future = Future()
+        request_id, pending = self._send(op, args, future)
+        try:
+            return future.result(timeout=_CALL_TIMEOUT)
+        except FutureTimeoutError:
+            self._forget(request_id, pending)
+            raise WorkerError(f"Puppeteer worker did not answer within {_CALL_TIMEOUT} seconds")
+    
+    def stream(self, op, args):
+        """Run a streaming op in the worker, yielding its binary chunks as they arrive; raises WorkerError on failure"""
+        chunks = queue.SimpleQueue()
+        request_id, pending = self._send(op, args, chunks)
+        try:
+            while True:
+                try:
+                    item = chunks.get(timeout=_CALL_TIMEOUT)
+                except queue.Empty:
+                    raise WorkerError(f"Puppeteer worker sent nothing for {_CALL_TIMEOUT} seconds")
+                if isinstance(item, Exception):
+                    raise item
+                if not isinstance(item, bytes):
+                    return  # the final result
+                yield item
+        finally:
+            self._forget(request_id, pending)
+    
+    def _read_responses(self, process, pending):
+        """Resolve pending calls from the worker's output until it exits"""
+        while True:
+            header = process.stdout.read(_FRAME_HEADER.size)
+            if len(header) < _FRAME_HEADER.size:
+                break
+            length, data_length = _FRAME_HEADER.unpack(header)
+            body = process.stdout.read(length)
+            data = process.stdout.read(data_length) if data_length else b''
+            if len(body) < length or len(data) < data_length:
+                break
+            try:
+                message = orjson.loads(body)
+            except ValueError:
+                continue
+            if 'event' in message:
+                self.draining = message['event'] == 'draining'
+                continue
+            request_id = message.get('id')
+            with self._lock:
+                waiter = pending.get(request_id)
+                # Chunks keep a stream's entry open; anything else ends the call
+                if waiter is not None and not (message.get('chunk') and isinstance(waiter, queue.SimpleQueue)):
+                    del pending[request_id]
+            if waiter is None:
+                continue
+            # A bad frame fails only the call it belongs to; the reader keeps serving the rest
+            if message.get('chunk'):
+                if isinstance(waiter, queue.SimpleQueue):
+                    waiter.put(data)
+                else:
+                    _resolve(waiter, WorkerError(f"Puppeteer worker streamed chunks for non-streaming call {request_id}"))
+            elif message.get('ok'):
+                result = message.get('result')
+                if not isinstance(result, dict):
+                    _resolve(waiter, WorkerError(f"Puppeteer worker sent a malformed result for call {request_id}"))
+                    continue
+                if data:
+                    result['data'] = data
+                _resolve(waiter, result)
+            else:
+                _resolve(waiter, WorkerError(message.get('error', 'Unknown worker error')))
+        
+        process.wait()
+        with self._lock:
+            if self._process is process:
+                self._process = None
+            orphaned = list(pending.values())
+            pending.clear()
+        for waiter in orphaned:
+            _resolve(waiter, WorkerError(f"Puppeteer worker exited with status {process.returncode}"))
+
+class WorkerPool:
+    """
+    PUPPETEER_WORKERS Node workers behind one call interface.
+    
+    Each call goes to the worker with the fewest calls in flight (ties in
+    round-robin order), so one server process can run
+    workers x MAX_CONCURRENT_RENDERS renders at once. Workers that are
+    replacing their browser are passed over while any sibling is available.
+    """
+    
+    def __init__(self, config):
+        if config.get('PUPPETEER_USER_DATA_DIR'):
+            _evict_stale_profiles(config['PUPPETEER_USER_DATA_DIR'], config.get('PUPPETEER_PROFILE_MAX_AGE_DAYS', 7))
+        self._workers = [WorkerClient(config) for _ in range(max(config.get('PUPPETEER_WORKERS', 1), 1))]
+        self._turns = itertools.count()
+    
+    def _least_loaded(self):
+        start = next(self._turns) % len(self._workers)
+        return min(
+            self._workers[start:] + self._workers[:start],
+            key=lambda worker: (worker.draining, worker.in_flight)
+        )
+    
+    def start(self):
+        """Start every worker ahead of the first call"""
+        for worker in self._workers:
+            worker.start()
+    
+    def submit(self, op, args):
+        """Send op to the least-loaded worker without waiting; returns a Future"""
+        return self._least_loaded().submit(op, args)
+    
+    def call(self, op, args):
+        """Run op on the least-loaded worker and return its result"""
+        return self._least_loaded().call(op, args)
+    
+    def stream(self, op, args):
+        """Run a streaming op on the least-loaded worker, yielding its binary chunks"""
+        return self._least_loaded().stream(op, args)
+
+# Shared worker pool (created lazily, since current_app is not available at import time)
+_pool = None
+_pool_lock = threading.Lock()
+
+def _get_pool():
+    """Return the module-level worker pool, creating it on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = WorkerPool(current_app.config)
+    return _pool
+
+def prestart():
+    """Start the Node workers, so Chromium is launched before the first call"""
+    _get_pool().start()
+
+@puppeteer_routes.record_once
+def on_register(state):
+    # Check the worker's prerequisites once at startup rather than per call
+    if not WORKER_SCRIPT.is_file():
+        state.app.logger.error(f"Puppeteer worker script not found: {WORKER_SCRIPT}")
+    if shutil.which('node') is None:
+        state.app.logger.error("Node.js not found on PATH; Puppeteer calls will fail")
+
+def _render(op, script_args):
+    """Run a render in the worker pool, logging where its time went"""
+    result = _get_pool().call(op, script_args)
+    timings = result.get('timings', {})
+    current_app.logger.debug(
+        f"puppeteer {op}: goto {timings.get('gotoMs')} ms, waitForSelector {timings.get('selectorMs')} ms"
+    )
+    return result
 
 def handle_action(action, parameters):
     """Handle Puppeteer tool actions according to MCP standard"""
-    ensure_script_dir()
-    
     action_handlers = {
         "screenshot": take_screenshot,
         "pdf": generate_pdf,
@@ -211,8 +386,8 @@ def handle_action(action, parameters):
     
     return action_handlers[action](parameters)
 
-def take_screenshot(parameters):
-    """Take a screenshot of a webpage"""
+def _screenshot_args(parameters):
+    """Validate screenshot parameters and build the worker arguments"""
     url = parameters.get('url')
     full_page = parameters.get('fullPage', False)
     image_type = parameters.get('type', 'png')
@@ -220,18 +395,13 @@ def take_screenshot(parameters):
     if not url:
         raise ValueError("URL parameter is required")
     
-    # Create a temporary file for the screenshot
-    with tempfile.NamedTemporaryFile(suffix=f'.{image_type}', delete=False) as tmp_file:
-        output_path = tmp_file.name
-    
-    # Prepare arguments for the Node.js script
+    # Prepare arguments for the worker
     script_args = {
         'url': url,
-        'outputPath': output_path,
         'fullPage': full_page,
         'type': image_type,
-        'headless': current_app.config.get('PUPPETEER_HEADLESS', True),
-        'executablePath': current_app.config.get('CHROME_PATH')
+        'blockResources': parameters.get('blockResources', _BLOCKED_RESOURCES['screenshot']),
+        'waitUntil': parameters.get('waitUntil', _WAIT_UNTIL['screenshot'])
     }
     
     # Add optional parameters if provided
@@ -239,83 +409,41 @@ def take_screenshot(parameters):
         if param in parameters:
             script_args[param] = parameters[param]
     
-    # Execute the Node.js script
-    script_path = SCRIPT_DIR / 'screenshot.js'
+    return script_args
+
+def take_screenshot(parameters):
+    """Take a screenshot of a webpage"""
+    script_args = _screenshot_args(parameters)
     
     try:
-        process = subprocess.run(
-            ['node', str(script_path), json.dumps(script_args)],
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        
-        # Parse the output
-        result = json.loads(process.stdout)
-        
-        # Read the screenshot file
-        with open(output_path, 'rb') as f:
-            image_data = f.read()
-        
-        # Encode as base64
-        base64_image = base64.b64encode(image_data).decode('utf-8')
-        
-        # Clean up the file
-        os.unlink(output_path)
+        result = _render('screenshot', script_args)
         
         return {
             'success': True,
-            'imageType': image_type,
-            'base64Image': base64_image
+            'imageType': script_args['type'],
+            'base64Image': base64.b64encode(result['data']).decode('ascii')
         }
     
-    except subprocess.CalledProcessError as e:
-        # Clean up the file
-        if os.path.exists(output_path):
-            os.unlink(output_path)
-        
-        error_message = e.stderr
-        try:
-            error_data = json.loads(error_message)
-            return {
-                'success': False,
-                'error': error_data.get('error', error_message)
-            }
-        except:
-            return {
-                'success': False,
-                'error': error_message
-            }
-    
     except Exception as e:
-        # Clean up the file
-        if os.path.exists(output_path):
-            os.unlink(output_path)
-        
         return {
             'success': False,
             'error': str(e)
         }
 
-def generate_pdf(parameters):
-    """Generate a PDF of a webpage"""
+def _pdf_args(parameters):
+    """Validate pdf parameters and build the worker arguments"""
     url = parameters.get('url')
     print_background = parameters.get('printBackground', True)
     
     if not url:
         raise ValueError("URL parameter is required")
     
-    # Create a temporary file for the PDF
-    with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as tmp_file:
-        output_path = tmp_file.name
-    
-    # Prepare arguments for the Node.js script
+    # Prepare arguments for the worker
     script_args = {
         'url': url,
-        'outputPath': output_path,
         'printBackground': print_background,
-        'headless': current_app.config.get('PUPPETEER_HEADLESS', True),
-        'executablePath': current_app.config.get('CHROME_PATH')
+        'blockResources': parameters.get('blockResources', _BLOCKED_RESOURCES['pdf']),
+        'waitUntil': parameters.get('waitUntil', _WAIT_UNTIL['pdf'])
     }
     
     # Add optional parameters if provided
@@ -323,58 +451,21 @@ def generate_pdf(parameters):
         if param in parameters:
             script_args[param] = parameters[param]
     
-    # Execute the Node.js script
-    script_path = SCRIPT_DIR / 'pdf.js'
+    return script_args
+
+def generate_pdf(parameters):
+    """Generate a PDF of a webpage"""
+    script_args = _pdf_args(parameters)
     
     try:
-        process = subprocess.run(
-            ['node', str(script_path), json.dumps(script_args)],
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        
-        # Parse the output
-        result = json.loads(process.stdout)
-        
-        # Read the PDF file
-        with open(output_path, 'rb') as f:
-            pdf_data = f.read()
-        
-        # Encode as base64
-        base64_pdf = base64.b64encode(pdf_data).decode('utf-8')
-        
-        # Clean up the file
-        os.unlink(output_path)
+        result = _render('pdf', script_args)
         
         return {
             'success': True,
-            'base64Pdf': base64_pdf
+            'base64Pdf': base64.b64encode(result['data']).decode('ascii')
         }
     
-    except subprocess.CalledProcessError as e:
-        # Clean up the file
-        if os.path.exists(output_path):
-            os.unlink(output_path)
-        
-        error_message = e.stderr
-        try:
-            error_data = json.loads(error_message)
-            return {
-                'success': False,
-                'error': error_data.get('error', error_message)
-            }
-        except:
-            return {
-                'success': False,
-                'error': error_message
-            }
-    
     except Exception as e:
-        # Clean up the file
-        if os.path.exists(output_path):
-            os.unlink(output_path)
-        
         return {
             'success': False,
             'error': str(e)
@@ -389,53 +480,36 @@ def extract_content(parameters):
     if not url:
         raise ValueError("URL parameter is required")
     
-    # Prepare arguments for the Node.js script
+    # Prepare arguments for the worker
     script_args = {
         'url': url,
         'selector': selector,
         'extractHtml': extract_html,
-        'headless': current_app.config.get('PUPPETEER_HEADLESS', True),
-        'executablePath': current_app.config.get('CHROME_PATH')
+        'blockResources': parameters.get('blockResources', _BLOCKED_RESOURCES['extract']),
+        'waitUntil': parameters.get('waitUntil', _WAIT_UNTIL['extract'])
     }
     
     # Add optional parameters if provided
-    for param in ['waitForSelector', 'waitTime', 'userAgent']:
+    for param in ['waitForSelector', 'waitTime', 'userAgent', 'maxLength']:
         if param in parameters:
             script_args[param] = parameters[param]
     
-    # Execute the Node.js script
-    script_path = SCRIPT_DIR / 'extract.js'
+    fields = parameters.get('fields')
+    if fields is not None:
+        if not selector:
+            raise ValueError("fields requires a selector")
+        if not isinstance(fields, list) or not all(isinstance(field, str) for field in fields):
+            raise ValueError("fields must be a list of attribute names")
+        script_args['fields'] = fields
     
     try:
-        process = subprocess.run(
-            ['node', str(script_path), json.dumps(script_args)],
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        
-        # Parse the output
-        result = json.loads(process.stdout)
+        result = _render('extract', script_args)
         
         return {
             'success': True,
             'content': result.get('content')
         }
     
-    except subprocess.CalledProcessError as e:
-        error_message = e.stderr
-        try:
-            error_data = json.loads(error_message)
-            return {
-                'success': False,
-                'error': error_data.get('error', error_message)
-            }
-        except:
-            return {
-                'success': False,
-                'error': error_message
-            }
-    
     except Exception as e:
         return {
             'success': False,
@@ -443,25 +517,83 @@ def extract_content(parameters):
         }
 
 # API routes for direct access (not through MCP gateway)
+
+def _prefers_binary(mimetype):
+    """Whether the client's Accept header prefers the raw file over the base64 JSON response"""
+    return request.accept_mimetypes.best_match(('application/json', mimetype)) == mimetype
+
 @puppeteer_routes.route('/screenshot', methods=['POST'])
 def api_screenshot():
     """API endpoint for taking a screenshot"""
     try:
         data = request.get_json()
-        result = take_screenshot(data)
-        return jsonify(result)
+        script_args = _screenshot_args(data)
+        mimetype = f"image/{script_args['type']}"
+        if not _prefers_binary(mimetype):
+            return jsonify(take_screenshot(data))
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 400
+    
+    # The client asked for the image itself, so skip base64 altogether
+    try:
+        result = _render('screenshot', script_args)
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+    return Response(result['data'], mimetype=mimetype)
+
+def _abort_on_error(chunks, what):
+    """
+    Pass chunks through, logging and re-raising a failure partway through.
+    
+    The 200 status line is already sent by then, so the response can't be
+    turned into an error. Raising makes the server drop the connection, so
+    the client sees a broken transfer rather than a short body that looks
+    complete.
+    """
+    try:
+        yield from chunks
+    except Exception as e:
+        current_app.logger.error(f"{what} failed mid-stream: {e}")
+        raise
+
+def _stream_base64_json(first, chunks, field):
+    """Yield {"success": true, <field>: "<base64>"}, encoding the bytes chunk by chunk as they arrive"""
+    yield b'{"success":true,"' + field + b'":"'
+    carry = b''
+    for chunk in itertools.chain([first], chunks):
+        chunk = carry + chunk
+        # Encode whole 3-byte groups only, so no padding lands mid-string
+        cut = len(chunk) - len(chunk) % 3
+        yield base64.b64encode(chunk[:cut])
+        carry = chunk[cut:]
+    yield base64.b64encode(carry) + b'"}\n'
 
 @puppeteer_routes.route('/pdf', methods=['POST'])
 def api_pdf():
     """API endpoint for generating a PDF"""
     try:
         data = request.get_json()
-        result = generate_pdf(data)
-        return jsonify(result)
+        script_args = _pdf_args(data)
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 400
+    
+    # The PDF is streamed from Chromium and encoded as it arrives, so the
+    # response starts before the document is complete and is never held whole.
+    # The first chunk is awaited here, so render failures still get a clean error;
+    # a failure after that aborts the connection (see _abort_on_error).
+    chunks = _get_pool().stream('pdfStream', script_args)
+    try:
+        first = next(chunks, b'')
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+    chunks = _abort_on_error(chunks, 'Puppeteer PDF')
+    
+    if _prefers_binary('application/pdf'):
+        return Response(stream_with_context(itertools.chain([first], chunks)), mimetype='application/pdf')
+    return Response(
+        stream_with_context(_stream_base64_json(first, chunks, b'base64Pdf')),
+        mimetype='application/json'
+    )
 
 @puppeteer_routes.route('/extract', methods=['POST'])
 def api_extract():
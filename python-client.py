@@ -5,43 +5,85 @@ Demonstrates how to interact with the MCP Gateway.
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 import os
 import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from dotenv import load_dotenv
 from typing import Dict, Any, List, Optional
 
 # Load environment variables
 load_dotenv()
 
+try:
+    import orjson
+    
+    def decode_json(response: requests.Response) -> Any:
+        """Parse a JSON response body with orjson, which is much faster on large payloads"""
+        return orjson.loads(response.content)
+except ImportError:
+    def decode_json(response: requests.Response) -> Any:
+        """Parse a JSON response body"""
+        return response.json()
+
 class MCPClient:
     """
     Client for the Model Context Protocol (MCP) server.
     """
     
-    def __init__(self, base_url: str):
+    def __init__(self, base_url: str, manifest_ttl: float = 60):
         """
         Initialize the MCP client.
         
         Args:
             base_url: The base URL of the MCP server
+            manifest_ttl: Seconds a fetched manifest is reused before it is fetched again
         """
         self.base_url = base_url
         self.gateway_url = f"{base_url}/mcp/gateway"
         self.manifest_url = f"{base_url}/mcp/manifest"
         self.manifest = None
+        self.manifest_ttl = manifest_ttl
+        self._manifest_fetched_at = 0.0
+        self._tool_names: List[str] = []
+        self._manifest_lock = threading.Lock()
+        
+        # One keep-alive connection pool for every call, instead of a new
+        # TCP (and TLS) handshake per request
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=32,
+            max_retries=Retry(total=2, backoff_factor=0.1)
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
     
-    def get_manifest(self) -> Dict[str, Any]:
+    def get_manifest(self, refresh: bool = False) -> Dict[str, Any]:
         """
         Get the MCP manifest describing available tools.
         
+        The manifest is cached for manifest_ttl seconds, so repeated
+        introspection does not cost a round trip each time.
+        
+        Args:
+            refresh: Fetch the manifest even if the cached copy is still fresh
+        
         Returns:
             The MCP manifest as a dictionary
         """
-        response = requests.get(self.manifest_url)
-        response.raise_for_status()
-        self.manifest = response.json()
-        return self.manifest
+        with self._manifest_lock:
+            if refresh or self.manifest is None or time.monotonic() - self._manifest_fetched_at >= self.manifest_ttl:
+                response = self.session.get(self.manifest_url)
+                response.raise_for_status()
+                self.manifest = decode_json(response)
+                self._manifest_fetched_at = time.monotonic()
+                self._tool_names = list(self.manifest["tools"].keys())
+            return self.manifest
     
     def call_tool(self, tool: str, action: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -61,9 +103,9 @@ class MCPClient:
             "parameters": parameters
         }
         
-        response = requests.post(self.gateway_url, json=payload)
+        response = self.session.post(self.gateway_url, json=payload)
         response.raise_for_status()
-        return response.json()
+        return decode_json(response)
     
     def list_tools(self) -> List[str]:
         """
@@ -72,10 +114,8 @@ class MCPClient:
         Returns:
             A list of tool names
         """
-        if not self.manifest:
-            self.get_manifest()
-        
-        return list(self.manifest["tools"].keys())
+        self.get_manifest()
+        return list(self._tool_names)
     
     def list_actions(self, tool: str) -> Dict[str, Dict[str, Any]]:
         """
@@ -87,13 +127,12 @@ class MCPClient:
         Returns:
             A dictionary of action names to action descriptions
         """
-        if not self.manifest:
-            self.get_manifest()
+        manifest = self.get_manifest()
         
-        if tool not in self.manifest["tools"]:
+        if tool not in manifest["tools"]:
             raise ValueError(f"Unknown tool: {tool}")
         
-        return self.manifest["tools"][tool]["actions"]
+        return manifest["tools"][tool]["actions"]
 
 def example_github_repos(client: MCPClient, username: str) -> None:
     """
@@ -264,11 +303,21 @@ def main():
         tools = client.list_tools()
         print(f"Available tools: {', '.join(tools)}")
         
-        # Run examples
-        example_github_repos(client, args.github_user)
-        example_memory_operations(client)
-        example_google_maps(client, args.address)
-        example_puppeteer(client, args.webpage)
+        # Run examples concurrently: they are independent, so the total
+        # wait is the slowest one rather than the sum. Their output may
+        # interleave; each section is headed by its own banner.
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            futures = [
+                pool.submit(example_github_repos, client, args.github_user),
+                pool.submit(example_memory_operations, client),
+                pool.submit(example_google_maps, client, args.address),
+                pool.submit(example_puppeteer, client, args.webpage)
+            ]
+            wait(futures)
+        
+        # Re-raise the first failure, if any
+        for future in futures:
+            future.result()
         
         print("\n✅ All examples completed successfully!")
     
@@ -8,18 +8,35 @@ import requests
 import json
 import sys
 import os
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+try:
+    import orjson
+    
+    def decode_json(response):
+        """Parse a JSON response body with orjson, which is much faster on large payloads"""
+        return orjson.loads(response.content)
+except ImportError:
+    def decode_json(response):
+        """Parse a JSON response body"""
+        return response.json()
+
 # Server URL
 BASE_URL = os.getenv('MCP_SERVER_URL', 'http://localhost:5000')
 
+# Shared session so every test reuses one keep-alive connection
+SESSION = requests.Session()
+
 def test_health():
     """Test the health check endpoint"""
     print("Testing health check endpoint...")
-    response = requests.get(f"{BASE_URL}/health")
+    response = SESSION.get(f"{BASE_URL}/health")
     
     if response.status_code == 200:
         print("✅ Health check successful")
@@ -30,10 +47,10 @@ def test_health():
 def test_manifest():
     """Test the MCP manifest endpoint"""
     print("\nTesting MCP manifest endpoint...")
-    response = requests.get(f"{BASE_URL}/mcp/manifest")
+    response = SESSION.get(f"{BASE_URL}/mcp/manifest")
     
     if response.status_code == 200:
-        manifest = response.json()
+        manifest = decode_json(response)
         print("✅ Manifest retrieved successfully")
         print(f"Available tools: {', '.join(manifest['tools'].keys())}")
     else:
@@ -55,10 +72,10 @@ def test_github_tool():
         }
     }
     
-    response = requests.post(f"{BASE_URL}/mcp/gateway", json=payload)
+    response = SESSION.post(f"{BASE_URL}/mcp/gateway", json=payload)
     
     if response.status_code == 200:
-        result = response.json()
+        result = decode_json(response)
         if result['status'] == 'success':
             print(f"✅ GitHub listRepos successful - found {len(result['result'])} repos")
         else:
@@ -69,7 +86,7 @@ def test_github_tool():
     
     # Test direct API endpoint
     print("Testing GitHub tool via direct API...")
-    response = requests.get(f"{BASE_URL}/tool/github/listRepos?username={github_username}")
+    response = SESSION.get(f"{BASE_URL}/tool/github/listRepos?username={github_username}")
     
     if response.status_code == 200:
         print("✅ Direct GitHub API request successful")
@@ -98,10 +115,10 @@ def test_memory_tool():
         }
     }
     
-    response = requests.post(f"{BASE_URL}/mcp/gateway", json=set_payload)
+    response = SESSION.post(f"{BASE_URL}/mcp/gateway", json=set_payload)
     
     if response.status_code == 200:
-        result = response.json()
+        result = decode_json(response)
         if result['status'] == 'success':
             print("✅ Memory set successful")
         else:
@@ -119,10 +136,10 @@ def test_memory_tool():
         }
     }
     
-    response = requests.post(f"{BASE_URL}/mcp/gateway", json=get_payload)
+    response = SESSION.post(f"{BASE_URL}/mcp/gateway", json=get_payload)
     
     if response.status_code == 200:
-        result = response.json()
+        result = decode_json(response)
         if result['status'] == 'success' and result['result']['value'] == value:
             print(f"✅ Memory get successful - retrieved value: {result['result']['value']}")
         else:
@@ -133,10 +150,10 @@ def test_memory_tool():
     
     # Test direct API endpoint for list operation
     print("Testing Memory tool via direct API...")
-    response = requests.get(f"{BASE_URL}/tool/memory/list")
+    response = SESSION.get(f"{BASE_URL}/tool/memory/list")
     
     if response.status_code == 200:
-        result = response.json()
+        result = decode_json(response)
         print(f"✅ Direct Memory API request successful - found {result['total']} items")
     else:
         print(f"❌ Direct Memory API request failed: {response.status_code}")
@@ -157,10 +174,10 @@ def test_puppeteer_tool():
         }
     }
     
-    response = requests.post(f"{BASE_URL}/mcp/gateway", json=screenshot_payload)
+    response = SESSION.post(f"{BASE_URL}/mcp/gateway", json=screenshot_payload)
     
     if response.status_code == 200:
-        result = response.json()
+        result = decode_json(response)
         if result['status'] == 'success' and 'base64Image' in result['result']:
             print("✅ Puppeteer screenshot successful - image received")
         else:
@@ -169,6 +186,69 @@ def test_puppeteer_tool():
         print(f"❌ Puppeteer screenshot request failed: {response.status_code}")
         print(response.text)
 
+class _CachePageHandler(BaseHTTPRequestHandler):
+    """Serves /page-<id> linking a cacheable /style-<id>.css, counting how often each path is fetched"""
+    hits = {}
+    
+    def do_GET(self):
+        _CachePageHandler.hits[self.path] = _CachePageHandler.hits.get(self.path, 0) + 1
+        if self.path.endswith('.css'):
+            body, content_type = b'body { color: teal; }', 'text/css'
+        else:
+            stylesheet = self.path.replace('/page-', '/style-', 1) + '.css'
+            body = f'<html><head><link rel="stylesheet" href="{stylesheet}"></head><body>cached</body></html>'.encode()
+            content_type = 'text/html'
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'max-age=3600')
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+def test_puppeteer_profile_cache():
+    """Test that a persistent Puppeteer profile serves repeat subresources from its disk cache"""
+    print("\nTesting Puppeteer profile cache...")
+    
+    if not os.getenv('PUPPETEER_USER_DATA_DIR'):
+        print("⏭️  Skipped: PUPPETEER_USER_DATA_DIR is not set")
+        return
+    
+    # Each Node worker runs its own Chromium, so the two renders only share a
+    # disk cache when they land on the same one; the settings come from the
+    # same .env the server reads
+    if os.getenv('GUNICORN_WORKERS') != '1' or os.getenv('PUPPETEER_WORKERS', '1') != '1':
+        print("⏭️  Skipped: needs a server with GUNICORN_WORKERS=1 and PUPPETEER_WORKERS=1")
+        return
+    
+    # The page is served from this machine, so the MCP server must run here too
+    _CachePageHandler.hits = {}
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _CachePageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    # Fresh page and stylesheet paths per run, so a stylesheet cached by an
+    # earlier run can't count as a hit even if the port is reused
+    run_id = uuid.uuid4().hex
+    page_url = f"http://127.0.0.1:{server.server_port}/page-{run_id}"
+    
+    try:
+        for _ in range(2):
+            response = SESSION.post(f"{BASE_URL}/tool/puppeteer/extract", json={"url": page_url, "waitUntil": "load"})
+            if response.status_code != 200 or not decode_json(response).get('success'):
+                print(f"❌ Puppeteer extract request failed: {response.status_code}")
+                print(response.text)
+                return
+    finally:
+        server.shutdown()
+        server.server_close()
+    
+    stylesheet_fetches = _CachePageHandler.hits.get(f'/style-{run_id}.css', 0)
+    if stylesheet_fetches == 1:
+        print("✅ Puppeteer profile cache hit - stylesheet fetched once for two renders")
+    else:
+        print(f"❌ Puppeteer profile cache missed - stylesheet fetched {stylesheet_fetches} times for two renders")
+
 def main():
     """Run all tests"""
     print("=== MCP Server Integration Tests ===")
@@ -180,6 +260,7 @@ def main():
         test_github_tool()
         test_memory_tool()
         test_puppeteer_tool()
+        test_puppeteer_profile_cache()
         
         print("\n✅ All tests completed!")
     except Exception as e:
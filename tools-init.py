@@ -4,24 +4,37 @@ MCP Tools Package
 Contains the various tool implementations for the Model Context Protocol server.
 """
 
+import importlib
+
 from flask import Flask
 
+# Tool name -> module implementing it. Each module defines a <name>_routes
+# blueprint and handle_action(), and optionally warmup().
+TOOL_MODULES = {
+    'github': 'tools.github_tool',
+    'gitlab': 'tools.gitlab_tool',
+    'gmaps': 'tools.gmaps_tool',
+    'memory': 'tools.memory_tool',
+    'puppeteer': 'tools.puppeteer_tool',
+    'tiered_memory': 'tiered_memory.mcp_interface'
+}
+
 def register_tools(app: Flask):
     """
-    Register all tool blueprints with the Flask application.
-    
+    Import the tools named in ENABLED_TOOLS and register their blueprints
+    with the Flask application. Tools that are not enabled are never imported.
+
     Args:
         app: The Flask application instance
+
+    Returns:
+        A dict of tool name to tool module, in the configured order
     """
-    from .github_tool import github_routes
-    from .gitlab_tool import gitlab_routes
-    from .gmaps_tool import gmaps_routes
-    from .memory_tool import memory_routes
-    from .puppeteer_tool import puppeteer_routes
-    
-    # Register blueprints
-    app.register_blueprint(github_routes, url_prefix='/tool/github')
-    app.register_blueprint(gitlab_routes, url_prefix='/tool/gitlab')
-    app.register_blueprint(gmaps_routes, url_prefix='/tool/gmaps')
-    app.register_blueprint(memory_routes, url_prefix='/tool/memory')
-    app.register_blueprint(puppeteer_routes, url_prefix='/tool/puppeteer')
+    tools = {}
+    for name in app.config.get('ENABLED_TOOLS', TOOL_MODULES):
+        if name not in TOOL_MODULES:
+            raise ValueError(f"Unknown tool in ENABLED_TOOLS: {name}")
+        module = importlib.import_module(TOOL_MODULES[name])
+        app.register_blueprint(getattr(module, f'{name}_routes'), url_prefix=f'/tool/{name}')
+        tools[name] = module
+    return tools